@@ -0,0 +1,60 @@
+"""Peak memory of one-shot vs. streaming base64 file codecs.
+
+Run from the repository root:
+
+    python -m benchmarks.file_codecs [size in MiB ...]
+"""
+import base64
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from pydantic_form_model.base64_stream import b64decode_to_file, b64encode_file
+
+
+def one_shot_decode(data: str, path: Path):
+    with open(path, 'wb') as f:
+        f.write(base64.b64decode(data))
+
+
+def one_shot_encode(path: Path):
+    with open(path, 'rb') as f:
+        return base64.b64encode(f.read()).decode()
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+def main(sizes_mib: list[int]):
+    print(f'{"size":>8} {"operation":<10} {"one-shot peak":>14} {"stream peak":>12} {"one-shot":>9} {"stream":>9}')
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'payload.bin'
+        for size in sizes_mib:
+            data = base64.b64encode(os.urandom(size * 1024 * 1024)).decode()
+            decode_one_shot = measure(one_shot_decode, data, path)
+            decode_stream = measure(b64decode_to_file, data, path)
+            del data
+            encode_one_shot = measure(one_shot_encode, path)
+            encode_stream = measure(b64encode_file, path)
+            for operation, (one_shot_time, one_shot_peak), (stream_time, stream_peak) in (
+                ('decode', decode_one_shot, decode_stream),
+                ('encode', encode_one_shot, encode_stream),
+            ):
+                print(
+                    f'{size:>6}Mi {operation:<10} {one_shot_peak / 2**20:>12.1f}Mi {stream_peak / 2**20:>10.1f}Mi '
+                    f'{one_shot_time:>8.3f}s {stream_time:>8.3f}s'
+                )
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [1, 16, 64])
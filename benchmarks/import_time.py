@@ -0,0 +1,55 @@
+"""Import time check for `import pydantic_form_model`.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time [--budget SECONDS] [--runs N]
+
+Fails (exit status 1) if the median import time exceeds the budget or if one of the
+lazily imported dependencies (FastAPI, asyncio, ...) is loaded by the import.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_BUDGET = 0.4
+
+LAZY_MODULES = ['fastapi', 'starlette', 'asyncio', 'concurrent.futures']
+
+SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import pydantic_form_model
+duration = time.perf_counter() - start
+print(json.dumps({'duration': duration, 'modules': [name for name in %r if name in sys.modules]}))
+''' % (LAZY_MODULES,)
+
+
+def measure() -> dict:
+    output = subprocess.run([sys.executable, '-c', SCRIPT], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help=f'maximum median import time in seconds (default: {DEFAULT_BUDGET})')
+    parser.add_argument('--runs', type=int, default=7, help='number of fresh interpreters to measure (default: 7)')
+    args = parser.parse_args(argv)
+
+    results = [measure() for _ in range(args.runs)]
+    median = statistics.median(result['duration'] for result in results)
+    loaded = sorted({name for result in results for name in result['modules']})
+    print(f'import pydantic_form_model: {median * 1e3:.1f}ms (median of {args.runs}, budget {args.budget * 1e3:.0f}ms)')
+    failed = False
+    if median > args.budget:
+        print('import time exceeds the budget')
+        failed = True
+    if loaded:
+        print(f'modules that should be imported lazily were loaded: {", ".join(loaded)}')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
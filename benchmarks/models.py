@@ -0,0 +1,99 @@
+"""Synthetic form models for the benchmarks."""
+import base64
+import os
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+
+from pydantic import create_model
+
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import Base64File, BinaryFile, FField
+
+
+class Choice(StrEnum):
+    first = 'First'
+    second = 'Second'
+    third = 'Third'
+
+
+FIELD_TYPES = [
+    (str, lambda index: FField(label=f'Text {index}', min_length=1, max_length=100)),
+    (int, lambda index: FField(label=f'Number {index}', gt=0, lt=1000)),
+    (Optional[float], lambda index: FField(label=f'Float {index}', default=None)),
+    (bool, lambda index: FField(label=f'Flag {index}', default=False)),
+    (Choice, lambda index: FField(label=f'Choice {index}', default=Choice.first)),
+    (Optional[datetime], lambda index: FField(label=f'Date {index}', default=None)),
+]
+
+
+# field types that can be sent as multipart form
+MULTIPART_FIELD_TYPES = FIELD_TYPES[:5]
+
+
+def wide_model(field_count: int = 1000, field_types: list = FIELD_TYPES) -> type[FormModel]:
+    fields = {}
+    for index in range(field_count):
+        annotation, field = field_types[index % len(field_types)]
+        fields[f'field_{index}'] = (annotation, field(index))
+    return create_model(f'WideForm{field_count}', __base__=FormModel, **fields)
+
+
+def deep_model(depth: int = 20) -> type[FormModel]:
+    model = create_model(
+        'DeepForm0',
+        __base__=FormModel,
+        name=(str, FField(label='Name')),
+        attachment=(Optional[Base64File], FField(label='Attachment', default=None))
+    )
+    for level in range(1, depth):
+        model = create_model(
+            f'DeepForm{level}',
+            __base__=FormModel,
+            name=(str, FField(label='Name')),
+            child=(model, FField(label=f'Level {level}'))
+        )
+    return model
+
+
+class Attachment(FormModel):
+    title: str = FField(label='Title')
+    files: list[Base64File] = FField(label='Files', default=[])
+
+
+class ListHeavyForm(FormModel):
+    attachments: list[Attachment] = FField(label='Attachments', default=[])
+    documents: list[Base64File] = FField(label='Documents', default=[])
+    tags: list[str] = FField(label='Tags', default=[])
+
+
+def deep_instance(model: type[FormModel]) -> FormModel:
+    data = {'name': 'leaf', 'attachment': {'name': 'leaf.bin'}}
+    depth = int(model.__name__.removeprefix('DeepForm'))
+    for _ in range(depth):
+        data = {'name': 'node', 'child': data}
+    return model.model_validate(data)
+
+
+def list_heavy_instance(attachments: int = 100, files_per_attachment: int = 5) -> ListHeavyForm:
+    return ListHeavyForm(
+        attachments=[
+            Attachment(title=f'attachment {index}', files=[Base64File(name=f'{index}-{file}.bin') for file in range(files_per_attachment)])
+            for index in range(attachments)
+        ],
+        documents=[Base64File(name=f'document-{index}.bin') for index in range(attachments)],
+        tags=[f'tag {index}' for index in range(attachments)],
+    )
+
+
+def file_form(file_count: int, file_size: int) -> ListHeavyForm:
+    data = base64.b64encode(os.urandom(file_size)).decode()
+    return ListHeavyForm(documents=[Base64File(name=f'file-{index}.bin', data=data) for index in range(file_count)])
+
+
+class BinaryUploadForm(FormModel, register=False):
+    scans: list[BinaryFile] = FField(default=[], max_file_size=64 * 1024 * 1024)
+
+
+def binary_form(file_count: int) -> BinaryUploadForm:
+    return BinaryUploadForm(scans=[BinaryFile(name=f'scan-{index}.bin') for index in range(file_count)])
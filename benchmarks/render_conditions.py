@@ -0,0 +1,49 @@
+"""Incremental vs. full re-evaluation of render conditions on a form with 500 conditional fields.
+
+Run from the repository root:
+
+    python -m benchmarks.render_conditions
+"""
+import random
+import timeit
+from typing import Optional
+
+from pydantic import create_model
+
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import FField, RenderCondition
+
+CONTROLLERS = 50
+CONDITIONAL_FIELDS = 500
+
+
+def build_model() -> type[FormModel]:
+    fields = {f'controller_{index}': (Optional[str], None) for index in range(CONTROLLERS)}
+    for index in range(CONDITIONAL_FIELDS):
+        condition = RenderCondition(property_path=f'controller_{index % CONTROLLERS}', has_value='show')
+        fields[f'field_{index}'] = (Optional[str], FField(default=None, render_conditions=[condition]))
+    return create_model('ConditionalForm', __base__=FormModel, **fields)
+
+
+def main():
+    model = build_model()
+    evaluator = model.get_render_evaluator()
+    values = {f'controller_{index}': random.choice(['show', 'hide']) for index in range(CONTROLLERS)}
+    state = evaluator.evaluate(values)
+
+    changes = [f'controller_{random.randrange(CONTROLLERS)}' for _ in range(1000)]
+    for changed in changes:
+        values[changed] = 'hide' if values[changed] == 'show' else 'show'
+        evaluator.update(state, values, [changed])
+        assert state == evaluator.evaluate(values), 'incremental evaluation differs from full evaluation'
+
+    number = 1000
+    full = timeit.timeit(lambda: evaluator.evaluate(values), number=number) / number
+    incremental = timeit.timeit(lambda: evaluator.update(state, values, ['controller_0']), number=number) / number
+    print(f'{CONDITIONAL_FIELDS} conditional fields, {CONTROLLERS} controlling fields')
+    print(f'full evaluation:        {full * 1e6:>9.1f} us')
+    print(f'incremental (1 change): {incremental * 1e6:>9.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Benchmark suite for definition generation, file I/O and multipart handling.
+
+Run from the repository root:
+
+    python -m benchmarks.suite                    # run and compare against benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline    # store the results as new baseline
+    python -m benchmarks.suite --check            # exit with status 1 on regressions
+
+Every case reports the best time of several repeats and the peak memory allocated by Python
+(tracemalloc) during a separate run.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+from typing import Callable
+
+from pydantic import TypeAdapter
+
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import FormField
+from pydantic_form_model.serialization import dump_form_fields, dump_form_fields_json
+from pydantic_form_model.registry import FormRegistry
+from pydantic_form_model.snapshots import load_snapshot, write_snapshot
+
+from .models import MULTIPART_FIELD_TYPES, binary_form, deep_instance, deep_model, file_form, list_heavy_instance, wide_model
+
+BASELINE = Path(__file__).with_name('baseline.json')
+
+Case = tuple[str, Callable[[], object], int]
+
+
+def definition_cases() -> list[Case]:
+    wide = wide_model(1000)
+    deep = deep_model(20)
+    form_fields = wide.get_form_fields()
+    adapter = TypeAdapter(list[FormField])
+
+    def cold(model: type[FormModel]):
+        def build():
+            FormModel.clear_form_definition_cache()
+            return model.get_form_fields()
+        return build
+
+    return [
+        ('get_form_fields[wide-1000, cold]', cold(wide), 5),
+        ('get_form_fields[wide-1000, cached]', wide.get_form_fields, 1000),
+        ('get_form_fields[deep-20, cold]', cold(deep), 20),
+        ('model_dump[wide-1000]', lambda: [form_field.model_dump() for form_field in form_fields], 5),
+        ('dump_json[wide-1000]', lambda: adapter.dump_json(form_fields, by_alias=True, serialize_as_any=True), 5),
+    ]
+
+
+def serialization_cases() -> list[Case]:
+    form_fields = wide_model(1000).get_form_fields()
+    return [
+        ('model_dump+json.dumps[wide-1000]', lambda: json.dumps([form_field.model_dump(by_alias=True) for form_field in form_fields]).encode(), 5),
+        ('dump_form_fields[wide-1000]', lambda: dump_form_fields(form_fields), 5),
+        ('dump_form_fields_json[wide-1000]', lambda: dump_form_fields_json(form_fields), 5),
+        ('dump_form_fields_json[wide-1000, exclude_none]', lambda: dump_form_fields_json(form_fields, exclude_none=True), 5),
+        ('dump_form_fields_json[wide-1000, exclude_defaults]', lambda: dump_form_fields_json(form_fields, exclude_defaults=True), 5),
+    ]
+
+
+def snapshot_cases(directory: Path) -> list[Case]:
+    wide = wide_model(1000)
+    snapshot = directory / 'definitions.snapshot'
+    write_snapshot(snapshot, [wide])
+
+    def live():
+        FormModel.clear_form_definition_cache()
+        return wide.get_form_definition().json
+
+    def restored():
+        FormModel.clear_form_definition_cache()
+        load_snapshot(snapshot, [wide])
+        return wide.get_form_definition().json
+
+    return [
+        ('definition_json[wide-1000, live]', live, 5),
+        ('definition_json[wide-1000, snapshot]', restored, 5),
+    ]
+
+
+def registry_cases() -> list[Case]:
+    registry = FormRegistry()
+    for index in range(20):
+        registry.register(wide_model(100), f'wide-{index}')
+    registry.register(deep_model(20), 'deep')
+
+    def warm(max_workers: int):
+        def build():
+            FormModel.clear_form_definition_cache()
+            return registry.warm(max_workers=max_workers)
+        return build
+
+    return [
+        ('registry.warm[21 forms, 1 worker]', warm(1), 5),
+        ('registry.warm[21 forms, 4 workers]', warm(4), 5),
+        ('registry.get_form_definition[cached]', lambda: registry.get_form_definition('deep'), 1000),
+    ]
+
+
+def file_data_field_cases() -> list[Case]:
+    list_heavy = list_heavy_instance(100, 5)
+    deep = deep_instance(deep_model(20))
+    wide = wide_model(1000).model_construct()
+    return [
+        ('file_data_fields[list-heavy-600]', lambda: list(list_heavy.file_data_fields()), 200),
+        ('file_data_fields[deep-20]', lambda: list(deep.file_data_fields()), 1000),
+        ('file_data_fields[wide-1000, no files]', lambda: list(wide.file_data_fields()), 1000),
+    ]
+
+
+def file_io_cases(directory: Path) -> list[Case]:
+    cases = []
+    for label, size, count in (('16KiB', 16 * 1024, 32), ('1MiB', 1024 * 1024, 8), ('8MiB', 8 * 1024 * 1024, 2)):
+        form = file_form(count, size)
+        target = directory / label
+        target.mkdir()
+        cases.append((f'save_files[{count}x{label}]', lambda form=form, target=target: form.save_files(target), 3))
+        cases.append((f'save_files[{count}x{label}, atomic]', lambda form=form, target=target: form.save_files(target, atomic=True), 3))
+        cases.append((f'load_files[{count}x{label}]', lambda form=form: form.load_files(), 3))
+    return cases
+
+
+def ingestion_cases(directory: Path) -> list[Case]:
+    content = os.urandom(8 * 1024 * 1024)
+    spool = directory / 'spool'
+    spool.mkdir()
+
+    def save(ingest: bool):
+        def run():
+            form = binary_form(2)
+            uploads = {file.name: BytesIO(content) for file in form.scans}
+            if ingest:
+                # spooled next to the target, save_files moves the temporary files into place
+                form.ingest_files(uploads, directory=spool)
+            else:
+                form.attach_files(uploads)
+            return form.save_files(directory)
+        return run
+
+    return [
+        ('attach+save_files[2x8MiB]', save(False), 3),
+        ('ingest+save_files[2x8MiB]', save(True), 3),
+    ]
+
+
+def multipart_cases() -> list[Case]:
+    wide = wide_model(1000, MULTIPART_FIELD_TYPES)
+    deep = deep_model(20)
+
+    def cold(model: type[FormModel]):
+        def build():
+            FormModel.clear_form_definition_cache()
+            return model.as_multipart_form()
+        return build
+
+    return [
+        ('as_multipart_form[wide-1000, cold]', cold(wide), 5),
+        ('as_multipart_form[deep-20, cold]', cold(deep), 20),
+        ('as_multipart_form[wide-1000, cached]', wide.as_multipart_form, 1000),
+    ]
+
+
+def measure(function: Callable[[], object], repeats: int) -> dict[str, float]:
+    function()  # warm up
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.1f}us'
+    if seconds < 1:
+        return f'{seconds * 1e3:.2f}ms'
+    return f'{seconds:.2f}s'
+
+
+def compare(result: dict[str, float], baseline: dict[str, float] | None, tolerance: float) -> tuple[str, bool]:
+    if not baseline:
+        return 'new', False
+    ratio = result['seconds'] / baseline['seconds'] if baseline['seconds'] else 1.0
+    memory_ratio = result['peak_bytes'] / baseline['peak_bytes'] if baseline['peak_bytes'] else 1.0
+    regression = ratio > 1 + tolerance or memory_ratio > 1 + tolerance
+    return f'{ratio:.2f}x time, {memory_ratio:.2f}x memory{"  REGRESSION" if regression else ""}', regression
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', type=Path, default=BASELINE, help='baseline file to compare with or to save to')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as baseline')
+    parser.add_argument('--check', action='store_true', help='exit with status 1 if a case regressed')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown / memory growth (default: 0.25)')
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this text')
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as directory:
+        cases = definition_cases() + serialization_cases() + snapshot_cases(Path(directory)) + registry_cases() + file_data_field_cases() + file_io_cases(Path(directory)) + ingestion_cases(Path(directory)) + multipart_cases()
+        print(f'{"case":<42} {"time":>10} {"peak memory":>12}  baseline')
+        for name, function, repeats in cases:
+            if args.filter not in name:
+                continue
+            result = measure(function, repeats)
+            results[name] = result
+            comparison, regression = compare(result, baseline.get(name), args.tolerance)
+            if regression:
+                regressions.append(name)
+            print(f'{name:<42} {format_seconds(result["seconds"]):>10} {result["peak_bytes"] / 2**20:>10.2f}Mi  {comparison}')
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(baseline | results, indent=2) + '\n')
+        print(f'baseline saved to {args.baseline}')
+    if regressions:
+        print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+        return 1 if args.check else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1 +1,10 @@
-from .form_model import FormModel, FormField, NumberField, TextField, ListField, ObjectField
\ No newline at end of file
+from .form_model import FormModel, FormField, NumberField, TextField, ListField, ObjectField
+from .classifier import FieldKind, register_field_kind
+from .instrumentation import InMemoryCollector, add_hook, remove_hook
+from .storage import FileStorage, DirectoryStorage, ContentAddressedStorage, MemoryStorage, StorageTransaction, DirectoryTransaction
+from .uploads import Upload, UploadManager
+from .data_sources import DataSourceRegistry, register_data_source
+from .choice_index import ChoiceIndex, ChoicePage, get_choice_index, index_for_enum
+from .serialization import dump_form_fields, dump_form_fields_json
+from .registry import FormRegistry, form_registry
+from .spooling import SpooledFile, spool_stream, spool_base64
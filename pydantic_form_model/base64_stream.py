@@ -0,0 +1,55 @@
+from typing import BinaryIO, Iterator
+from os import PathLike
+import base64
+
+# 1 MiB, a multiple of 3 and of 4, so chunk boundaries always align with base64 quanta
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def b64decoded_size(data: str) -> int:
+    """Number of bytes encoded in base64 `data`, without decoding it."""
+    length = len(data)
+    # whitespace (e.g. line breaks of MIME base64) does not encode any bytes
+    if any(character in data for character in ' \t\r\n'):
+        length -= sum(data.count(character) for character in ' \t\r\n')
+    padding = 2 if data.rstrip().endswith('==') else 1 if data.rstrip().endswith('=') else 0
+    return max(length * 3 // 4 - padding, 0)
+
+
+def b64decode_to_stream(data: str, stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Decode base64 `data` into `stream` in blocks of `chunk_size` characters.
+
+    Returns the number of bytes written.
+    """
+    step = max(chunk_size - chunk_size % 4, 4)
+    written = 0
+    remainder = ''
+    for start in range(0, len(data), step):
+        # whitespace would shift the 4 character quanta, strip it and carry over incomplete quanta
+        chunk = remainder + ''.join(data[start:start + step].split())
+        usable = len(chunk) - len(chunk) % 4
+        written += stream.write(base64.b64decode(chunk[:usable]))
+        remainder = chunk[usable:]
+    if remainder:
+        written += stream.write(base64.b64decode(remainder))
+    return written
+
+
+def b64encode_from_stream(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Read `stream` in blocks of about `chunk_size` bytes and yield the base64 encoded blocks."""
+    step = max(chunk_size - chunk_size % 3, 3)
+    while True:
+        block = stream.read(step)
+        if not block:
+            return
+        yield base64.b64encode(block).decode()
+
+
+def b64decode_to_file(data: str, path: str | PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    with open(path, 'wb') as f:
+        return b64decode_to_stream(data, f, chunk_size)
+
+
+def b64encode_file(path: str | PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    with open(path, 'rb') as f:
+        return ''.join(b64encode_from_stream(f, chunk_size))
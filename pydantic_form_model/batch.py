@@ -0,0 +1,78 @@
+from typing import Any, Iterable, Iterator, Optional
+from itertools import islice
+from pydantic import TypeAdapter, ValidationError
+from .form_fields import BaseSchema
+from .validation import iter_field_errors, format_path
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class SubmissionError(BaseSchema):
+    row: int
+    path: str
+    field_name: Optional[str] = None
+    label: Optional[str] = None
+    message: str
+    error_type: str
+
+
+class BatchValidationResult(BaseSchema):
+    valid: list[Any] = []
+    valid_rows: list[int] = []
+    errors: list[SubmissionError] = []
+
+    @property
+    def failed_rows(self) -> list[int]:
+        return list(dict.fromkeys(error.row for error in self.errors))
+
+
+def field_label(model_cls: Optional[type], field_name: Optional[str]) -> Optional[str]:
+    if model_cls is None or field_name is None or field_name not in model_cls.model_fields:
+        return None
+    field_schema = model_cls.model_fields[field_name].json_schema_extra
+    return field_schema.get('label') if isinstance(field_schema, dict) else None
+
+
+def validate_chunk(model_cls: type, adapter: TypeAdapter, items: list[Any], offset: int = 0) -> BatchValidationResult:
+    """Validate a chunk of raw submissions row by row with the adapter of the model, every row is validated once."""
+    result = BatchValidationResult()
+    validate = adapter.validate_python
+    for row, item in enumerate(items, offset):
+        try:
+            instance = validate(item)
+        except ValidationError as e:
+            for owner, field_name, path, message, error_type in iter_field_errors(model_cls, e.errors()):
+                result.errors.append(SubmissionError(
+                    row=row,
+                    path=format_path(path),
+                    field_name=field_name,
+                    label=field_label(owner, field_name),
+                    message=message,
+                    error_type=error_type
+                ))
+            continue
+        result.valid.append(instance)
+        result.valid_rows.append(row)
+    return result
+
+
+def iter_validate_batches(model_cls: type, items: Iterable[Any], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[BatchValidationResult]:
+    """Validate submissions in chunks of `batch_size` and yield the result of each chunk.
+
+    Only one chunk is held in memory at a time, row numbers count from the start of `items`.
+    """
+    adapter = model_cls.get_batch_adapter()
+    iterator = iter(items)
+    offset = 0
+    while chunk := list(islice(iterator, batch_size)):
+        yield validate_chunk(model_cls, adapter, chunk, offset)
+        offset += len(chunk)
+
+
+def validate_batch(model_cls: type, items: Iterable[Any]) -> BatchValidationResult:
+    result = BatchValidationResult()
+    for chunk_result in iter_validate_batches(model_cls, items):
+        result.valid += chunk_result.valid
+        result.valid_rows += chunk_result.valid_rows
+        result.errors += chunk_result.errors
+    return result
@@ -0,0 +1,112 @@
+from typing import Any, Literal, Optional
+from collections import OrderedDict
+from bisect import bisect_left
+from enum import Enum
+import threading
+from .form_fields import BaseSchema
+from .exceptions import FormModelException
+
+DEFAULT_PAGE_SIZE = 50
+# number of substring queries whose matches are kept per index
+QUERY_CACHE_SIZE = 128
+
+
+class ChoicePage(BaseSchema):
+    index: str
+    total: int
+    offset: int
+    limit: int
+    items: list[Any]
+
+
+class ChoiceIndex:
+    """Searchable, paginated choices of a select field.
+
+    Prefix search uses a sorted key list (results in alphabetical order), substring search scans
+    the keys once per query (results in the order of the choices) and keeps recent queries.
+    Matching ignores case.
+    """
+    def __init__(self, name: str, choices: list[Any]):
+        self.name = name
+        self.choices = choices
+        self.keys = [str(choice).casefold() for choice in choices]
+        order = sorted(range(len(choices)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[position] for position in order]
+        self.sorted_positions = order
+        self._queries: OrderedDict[str, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _substring_matches(self, query: str) -> list[int]:
+        with self._lock:
+            matches = self._queries.get(query)
+            if matches is not None:
+                self._queries.move_to_end(query)
+                return matches
+        matches = [position for position, key in enumerate(self.keys) if query in key]
+        with self._lock:
+            self._queries[query] = matches
+            while len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        return matches
+
+    def search(self, query: str = '', offset: int = 0, limit: int = DEFAULT_PAGE_SIZE, mode: Literal['prefix', 'substring'] = 'prefix') -> ChoicePage:
+        offset = max(offset, 0)
+        limit = max(limit, 0)
+        query = query.casefold()
+        if not query:
+            items = self.choices[offset:offset + limit]
+            total = len(self.choices)
+        elif mode == 'prefix':
+            start = bisect_left(self.sorted_keys, query)
+            # every key with the prefix sorts before prefix + the highest code point
+            end = bisect_left(self.sorted_keys, query + '\U0010ffff', start)
+            total = end - start
+            positions = self.sorted_positions[start + offset:min(start + offset + limit, end)]
+            items = [self.choices[position] for position in positions]
+        elif mode == 'substring':
+            matches = self._substring_matches(query)
+            total = len(matches)
+            items = [self.choices[position] for position in matches[offset:offset + limit]]
+        else:
+            raise FormModelException(f'Invalid search mode {mode}')
+        return ChoicePage(index=self.name, total=total, offset=offset, limit=limit, items=items)
+
+    def __len__(self) -> int:
+        return len(self.choices)
+
+
+choice_indexes: dict[str, ChoiceIndex] = {}
+_enum_indexes: dict[type, ChoiceIndex] = {}
+# enums whose index is built when it is first requested by name
+_deferred_enums: dict[str, type[Enum]] = {}
+_lock = threading.Lock()
+
+
+def _index_name(enum: type[Enum]) -> str:
+    return f'{enum.__module__}.{enum.__qualname__}'
+
+
+def index_for_enum(enum: type[Enum]) -> ChoiceIndex:
+    """Choice index of the values of `enum`, built once per enum."""
+    index = _enum_indexes.get(enum)
+    if index is None:
+        with _lock:
+            index = _enum_indexes.get(enum)
+            if index is None:
+                index = ChoiceIndex(_index_name(enum), [member.value for member in enum])
+                choice_indexes[index.name] = index
+                _enum_indexes[enum] = index
+    return index
+
+
+def defer_index_for_enum(enum: type[Enum]):
+    """Make the index of `enum` available by name without building it, e.g. for definitions restored from a snapshot."""
+    if enum not in _enum_indexes:
+        _deferred_enums.setdefault(_index_name(enum), enum)
+
+
+def get_choice_index(name: str) -> Optional[ChoiceIndex]:
+    index = choice_indexes.get(name)
+    if index is None and name in _deferred_enums:
+        index = index_for_enum(_deferred_enums[name])
+    return index
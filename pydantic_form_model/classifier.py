@@ -0,0 +1,122 @@
+from typing import Any, Callable, Optional, get_origin
+from enum import Enum
+import inspect
+
+
+class FieldKind(str, Enum):
+    CUSTOM = 'custom'
+    DATETIME = 'datetime'
+    SELECT = 'select'
+    FILE = 'file'
+    LIST = 'list'
+    OBJECT = 'object'
+    DICT = 'dict'
+    NUMBER = 'number'
+    TEXT = 'text'
+    LITERAL = 'literal'
+    BOOLEAN = 'boolean'
+
+
+FieldKindName = FieldKind | str
+FieldBuilder = Callable[..., Any]
+
+
+class AnnotationClassifier:
+    """Classifies (unpacked) field annotations into field kinds.
+
+    Annotations are dispatched by lookup tables instead of a chain of checks:
+    parametrized generics by their origin (`list[int]` -> `list`), plain types by
+    exact type and then by their MRO for registered base classes (e.g. `Enum`).
+    Predicates are only used for kinds that can't be expressed as a table entry.
+    Results are memoized per annotation object.
+    """
+    def __init__(self):
+        self._by_origin: dict[Any, FieldKindName] = {}
+        self._by_type: dict[type, FieldKindName] = {}
+        self._by_base: dict[type, FieldKindName] = {}
+        self._predicates: list[tuple[Callable[[Any], bool], FieldKindName]] = []
+        self._builders: dict[FieldKindName, FieldBuilder] = {}
+        self._cache: dict[Any, Optional[FieldKindName]] = {}
+
+    def register(
+        self,
+        kind: FieldKindName,
+        builder: Optional[FieldBuilder] = None,
+        origins: tuple = (),
+        types: tuple[type, ...] = (),
+        subclasses_of: tuple[type, ...] = (),
+        predicate: Optional[Callable[[Any], bool]] = None
+    ):
+        """Register a field kind.
+
+        Args:
+            kind: Name of the kind.
+            builder: Callable `(annotation, field_name, field_info, field_definition)` that returns the `FormField` for the kind.
+            origins: Generic origins of the kind (e.g. `list` for `list[int]`).
+            types: Exact types of the kind.
+            subclasses_of: Base classes whose subclasses belong to the kind.
+            predicate: Fallback check for annotations that are not matched by the tables.
+        """
+        for origin in origins:
+            self._by_origin[origin] = kind
+        for annotation_type in types:
+            self._by_type[annotation_type] = kind
+        for base in subclasses_of:
+            self._by_base[base] = kind
+        if predicate is not None:
+            self._predicates.append((predicate, kind))
+        if builder is not None:
+            self._builders[kind] = builder
+        self._cache.clear()
+
+    def classify(self, annotation: Any) -> Optional[FieldKindName]:
+        try:
+            return self._cache[annotation]
+        except KeyError:
+            kind = self._classify(annotation)
+            self._cache[annotation] = kind
+            return kind
+        except TypeError:
+            # unhashable annotation (e.g. Annotated with unhashable metadata)
+            return self._classify(annotation)
+
+    def _classify(self, annotation: Any) -> Optional[FieldKindName]:
+        origin = get_origin(annotation)
+        if origin is not None:
+            kind = self._by_origin.get(origin)
+            if kind is not None:
+                return kind
+        elif inspect.isclass(annotation):
+            kind = self._by_type.get(annotation)
+            if kind is not None:
+                return kind
+            for base in annotation.__mro__:
+                kind = self._by_base.get(base)
+                if kind is not None:
+                    return kind
+        for predicate, kind in self._predicates:
+            if predicate(annotation):
+                return kind
+        return None
+
+    def get_builder(self, kind: FieldKindName) -> Optional[FieldBuilder]:
+        return self._builders.get(kind)
+
+
+classifier = AnnotationClassifier()
+
+
+def register_field_kind(
+    kind: FieldKindName,
+    builder: Optional[FieldBuilder] = None,
+    origins: tuple = (),
+    types: tuple[type, ...] = (),
+    subclasses_of: tuple[type, ...] = (),
+    predicate: Optional[Callable[[Any], bool]] = None
+):
+    """Register a custom field kind on the shared classifier (see `AnnotationClassifier.register`)."""
+    classifier.register(kind, builder, origins=origins, types=types, subclasses_of=subclasses_of, predicate=predicate)
+
+
+def classify(annotation: Any) -> Optional[FieldKindName]:
+    return classifier.classify(annotation)
@@ -0,0 +1,124 @@
+from typing import Any, Callable, Iterable, Optional
+from collections import OrderedDict
+import inspect
+import logging
+import threading
+import time
+from .exceptions import DataSourceException
+
+logger = logging.getLogger(__name__)
+
+# returns the choices of a data source, sync or async
+Resolver = Callable[..., Any]
+
+DEFAULT_TTL = 300.0
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class DataSourceRegistry:
+    """Resolvers for `data_source` names of select fields.
+
+    Resolved choices are cached for `ttl` seconds (per resolver if registered with its own ttl),
+    at most `max_entries` results are kept and the least recently used are evicted first.
+    Concurrent requests for the same source (and parameters) share one call of the resolver.
+    Sync resolvers run in worker threads, so the sources of a form are resolved concurrently.
+    """
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.resolvers: dict[str, tuple[Resolver, Optional[float]]] = {}
+        self._cache: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        # (event loop, task) of the resolvers that are running
+        self._in_flight: dict[tuple, tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, resolver: Optional[Resolver] = None, ttl: Optional[float] = None):
+        """Register the resolver of `name`, can be used as decorator."""
+        def decorator(resolver: Resolver) -> Resolver:
+            self.resolvers[name] = (resolver, ttl)
+            self.invalidate(name)
+            return resolver
+        return decorator(resolver) if resolver is not None else decorator
+
+    def unregister(self, name: str):
+        self.resolvers.pop(name, None)
+        self.invalidate(name)
+
+    def invalidate(self, name: Optional[str] = None):
+        with self._lock:
+            for key in [key for key in self._cache if name is None or key[0] == name]:
+                del self._cache[key]
+
+    def _cached(self, key: tuple) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._cache[key]
+                return False, None
+            self._cache.move_to_end(key)
+            return True, entry[1]
+
+    def _store(self, key: tuple, value: Any, ttl: float):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    async def resolve(self, name: str, **params) -> Any:
+        """Choices of the data source `name`, `params` are passed to the resolver."""
+        import asyncio
+        if name not in self.resolvers:
+            raise DataSourceException(f'No resolver registered for data source {name}')
+        resolver, ttl = self.resolvers[name]
+        key = (name, tuple(sorted(params.items())))
+        found, value = self._cached(key)
+        if found:
+            return value
+        loop = asyncio.get_running_loop()
+        in_flight = self._in_flight.get(key)
+        # requests of other event loops can not await the task of this loop
+        if in_flight is None or in_flight[0] is not loop:
+            # the resolver runs in a task of the registry, so cancelling one request does not cancel the others
+            task = loop.create_task(self._fetch(key, resolver, params, ttl if ttl is not None else self.ttl))
+            self._in_flight[key] = in_flight = (loop, task)
+            task.add_done_callback(lambda task: self._done(key, task))
+        return await asyncio.shield(in_flight[1])
+
+    async def _fetch(self, key: tuple, resolver: Resolver, params: dict, ttl: float) -> Any:
+        import asyncio
+        if inspect.iscoroutinefunction(resolver):
+            value = await resolver(**params)
+        else:
+            value = await asyncio.to_thread(resolver, **params)
+        self._store(key, value, ttl)
+        return value
+
+    def _done(self, key: tuple, task: Any):
+        if self._in_flight.get(key, (None, None))[1] is task:
+            del self._in_flight[key]
+        # retrieved, so a failure is not logged as unhandled when every request was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def resolve_many(self, names: Iterable[str]) -> dict[str, Any]:
+        """Resolve several data sources concurrently."""
+        import asyncio
+        names = list(dict.fromkeys(names))
+        values = await asyncio.gather(*(self.resolve(name) for name in names))
+        return dict(zip(names, values))
+
+    def resolve_many_sync(self, names: Iterable[str]) -> dict[str, Any]:
+        """`resolve_many` for code outside of an event loop."""
+        import asyncio
+        return asyncio.run(self.resolve_many(names))
+
+
+# registry used by FormModel.resolve_form_fields by default
+data_sources = DataSourceRegistry()
+
+
+def register_data_source(name: str, resolver: Optional[Resolver] = None, ttl: Optional[float] = None):
+    return data_sources.register(name, resolver, ttl)
@@ -5,4 +5,20 @@ class FormModelException(Exception):
         super().__init__(message)
 
 class InvalidDefinitionException(FormModelException):
-    pass
\ No newline at end of file
+    pass
+
+class FileOperationException(FormModelException):
+    def __init__(self, message: str, failures: list) -> None:
+        self.failures = failures
+        super().__init__(message)
+
+class UploadException(FormModelException):
+    pass
+
+class DataSourceException(FormModelException):
+    pass
+
+class FileTooLargeException(FormModelException):
+    def __init__(self, message: str, limit: int) -> None:
+        self.limit = limit
+        super().__init__(message)
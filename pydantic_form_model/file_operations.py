@@ -0,0 +1,81 @@
+from typing import Any, Callable, Iterable, Optional
+import logging
+import time
+from .exceptions import FileOperationException
+from .instrumentation import hooks, emit
+
+logger = logging.getLogger(__name__)
+
+# default number of concurrent file operations of the async file helpers
+DEFAULT_MAX_WORKERS = 8
+
+FileOperation = Callable[[Any], None]
+
+
+class FileOperationFailure:
+    def __init__(self, file: Any, error: Exception):
+        self.file = file
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f'FileOperationFailure(file={getattr(self.file, "name", self.file)!r}, error={self.error!r})'
+
+
+def run_single(operation: FileOperation, file: Any, action: str = 'operation') -> Optional[FileOperationFailure]:
+    start = time.perf_counter() if hooks else 0.0
+    try:
+        operation(file)
+    except Exception as e:
+        logger.debug('file %s of %s failed: %s', action, getattr(file, 'name', file), e)
+        if hooks:
+            emit(f'file.{action}', time.perf_counter() - start, file=getattr(file, 'name', None), error=e)
+        return FileOperationFailure(file, e)
+    if hooks:
+        emit(f'file.{action}', time.perf_counter() - start, file=getattr(file, 'name', None), error=None)
+    return None
+
+
+def run_file_operation(operation: FileOperation, files: Iterable[Any], max_workers: int = 1, action: str = 'operation') -> list[FileOperationFailure]:
+    """Run `operation` for every file with up to `max_workers` threads and collect the failures.
+
+    With a single worker the files are processed one after another and the first failure stops the run.
+    """
+    files = list(files)
+    if max_workers <= 1:
+        for file in files:
+            failure = run_single(operation, file, action)
+            if failure is not None:
+                return [failure]
+        return []
+    if len(files) <= 1:
+        results = [run_single(operation, file, action) for file in files]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+            results = list(executor.map(lambda file: run_single(operation, file, action), files))
+    return [failure for failure in results if failure is not None]
+
+
+async def arun_file_operation(operation: FileOperation, files: Iterable[Any], max_workers: int = DEFAULT_MAX_WORKERS, action: str = 'operation') -> list[FileOperationFailure]:
+    """Run `operation` for every file in worker threads without blocking the event loop.
+
+    At most `max_workers` operations run at the same time.
+    """
+    import asyncio
+    semaphore = asyncio.Semaphore(max(max_workers, 1))
+    async def run(file: Any):
+        async with semaphore:
+            return await asyncio.to_thread(run_single, operation, file, action)
+    results = await asyncio.gather(*(run(file) for file in files))
+    return [failure for failure in results if failure is not None]
+
+
+def raise_for_failures(action: str, failures: list[FileOperationFailure], original: bool = False):
+    """Raise the failures as one `FileOperationException`, or with `original` the error of the first failure as it is."""
+    if not failures:
+        return
+    if original:
+        raise failures[0].error
+    names = ', '.join(str(getattr(failure.file, 'name', failure.file)) for failure in failures)
+    exception = FileOperationException(f'Failed to {action} {len(failures)} file(s): {names}', failures)
+    raise exception from failures[0].error
@@ -89,7 +89,8 @@ class FormFieldType(str, Enum):
 
 
 class FormField(BaseSchema):
-    model_config: ConfigDict = ConfigDict(alias_generator=lambda name: camelize(name), populate_by_name=True)
+    # form fields are cached and shared by all callers of get_form_fields, use model_copy to change them
+    model_config: ConfigDict = ConfigDict(alias_generator=lambda name: camelize(name), populate_by_name=True, frozen=True)
     field_type: FormFieldType|str
     name: str
     hint: Optional[str] = None
@@ -102,6 +103,8 @@ class FormField(BaseSchema):
     validation_rules: list[ValidationRule] = []
     item_definition: Optional[Any] = None
     choices: Optional[list[Any]] = None
+    # name of the choice index that serves the choices instead of `choices`
+    choices_index: Optional[str] = None
     data_source: Optional[DataSource] = None
     item_value: Optional[str] = None
     radios: Optional[bool] = None
@@ -120,8 +123,18 @@ class DateTimeField(FormField):
     field_type: Literal[FormFieldType.DATETIME] = FormFieldType.DATETIME 
 
 
+class FileTransfer(str, Enum):
+    BASE64 = 'base64'
+    BINARY = 'binary'
+
 class FileField(FormField):
     field_type: Literal[FormFieldType.FILE] = FormFieldType.FILE
+    # how the file content is sent: base64 encoded in the JSON or as raw multipart part
+    transfer: FileTransfer = FileTransfer.BASE64
+    # chunked, resumable upload, see UploadManager
+    chunked_upload: Optional[bool] = None
+    chunk_size: Optional[int] = None
+    max_file_size: Optional[int] = None
 
 class SelectField(FormField):
     field_type: Literal[FormFieldType.SELECT] = FormFieldType.SELECT
@@ -143,6 +156,7 @@ class CustomField(FormField):
 class ObjectField(FormField):
     field_type: Literal[FormFieldType.OBJECT] = FormFieldType.OBJECT
     item_properties: list[Any]
+    ref: Optional[str] = None
 
 class ListField(FormField):
     field_type: Literal[FormFieldType.LIST] = FormFieldType.LIST
@@ -150,6 +164,12 @@ class ListField(FormField):
 
 ListField.model_rebuild()
 
+class RefFormDefinition(BaseSchema):
+    # name of the form itself, references to it refer to `fields`
+    ref: Optional[str] = None
+    fields: list[FormField]
+    definitions: dict[str, list[FormField]] = {}
+
 
 def FField(  # noqa: C901
     default: Any = PydanticUndefined,
@@ -164,8 +184,13 @@ def FField(  # noqa: C901
     label: Optional[str] = _Unset,
     validation_rules: Optional[list[ValidationRule]] = [],
     choices: Optional[list[Any]] = _Unset,
+    data_source: Optional[DataSource] = _Unset,
+    indexed_choices: Optional[bool] = _Unset,
     radios: Optional[bool] = _Unset,
     inline: Optional[bool] = _Unset,
+    chunked_upload: Optional[bool] = _Unset,
+    chunk_size: Optional[int] = _Unset,
+    max_file_size: Optional[int] = _Unset,
     alias_priority: int | None = _Unset,
     validation_alias: str | AliasPath | AliasChoices | None = _Unset,
     serialization_alias: str | None = _Unset,
@@ -225,6 +250,11 @@ def FField(  # noqa: C901
         label: Text label for this fields,
         validation_rules: A list of additional validation rules for this field,
         choices: Choices for this field (can be used to store possible selections),
+        data_source: Name of the data source the choices of this field are resolved from,
+        indexed_choices: Serve the choices of an enum through a searchable choice index instead of including them in the definition,
+        chunked_upload: Wether the content of this file field is sent as chunked, resumable upload,
+        chunk_size: Chunk size of chunked uploads of this file field,
+        max_file_size: Maximum size of files of this file field in bytes, enforced by validation, `ingest_files` and multipart forms,
         alias_priority: Priority of the alias. This affects whether an alias generator is used.
         validation_alias: Like `alias`, but only affects validation, not serialization.
         serialization_alias: Like `alias`, but only affects serialization, not validation.
@@ -283,8 +313,13 @@ def FField(  # noqa: C901
         label = label,
         validation_rules = validation_rules,
         choices = choices,
+        data_source = data_source,
+        indexed_choices = indexed_choices,
         radios=radios,
         inline=inline,
+        chunked_upload=chunked_upload,
+        chunk_size=chunk_size,
+        max_file_size=max_file_size,
         alias_priority = alias_priority,
         validation_alias = validation_alias,
         serialization_alias = serialization_alias,
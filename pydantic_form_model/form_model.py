@@ -2,16 +2,36 @@ from .form_fields import *
 from .types import *
 from typing import get_origin, get_args, Union, Annotated
 from .exceptions import *
+from .classifier import FieldKind, classifier, classify
+from .base64_stream import DEFAULT_CHUNK_SIZE, b64decode_to_stream, b64decoded_size, b64encode_from_stream
+from .storage import FileStorage, DirectoryStorage, StorageTransaction
+from .uploads import DEFAULT_UPLOAD_CHUNK_SIZE, UploadManager
+from .spooling import DEFAULT_SPOOL_THRESHOLD, SizeBudget, SpooledFile, spool_stream
+from .data_sources import DataSourceRegistry, data_sources
+from .choice_index import index_for_enum
+from .serialization import dump_form_fields_json
+from .validation import CONSTRAINT_RULES, RuleValidator, FieldValidator, FieldValidationResult, format_path, validate_many
+from .batch import DEFAULT_BATCH_SIZE, BatchValidationResult, validate_batch, iter_validate_batches
+from .render_conditions import RenderEvaluator, build_conditions, parse_path, compile_accessor
+from .instrumentation import hooks, emit
+from .registry import form_registry, model_name
+from .file_operations import DEFAULT_MAX_WORKERS, FileOperationFailure, run_file_operation, arun_file_operation, raise_for_failures
 from pydantic.fields import FieldInfo
 import logging
 from annotated_types import Gt, Lt, MinLen, MaxLen
-import inspect, base64
+import inspect, time
+import threading
+from contextvars import ContextVar
+import collections.abc
 from os import PathLike
 from pathlib import Path
 from datetime import datetime
+from types import UnionType
 import inspect
-from fastapi import Form, UploadFile, Depends
-from typing import Annotated, Sequence
+from typing import Annotated, Callable, ClassVar, Sequence, Iterator, Iterable
+from pydantic import BaseModel, TypeAdapter, model_validator
+from pydantic_core import PydanticCustomError
+import hashlib
 logger = logging.getLogger(__name__)
 logger.debug('Test message')
 
@@ -57,14 +77,18 @@ def get_list_item_type(annotation: type):
     return get_args(annotation)[0]
 
 def is_number(annotation: type):
-    return annotation == int or annotation == float or annotation == FormNumber 
+    return annotation == int or annotation == float or is_number_union(annotation)
+
+def is_number_union(annotation: type):
+    # FormNumber (`int|float`) is a types.UnionType, which is not unpacked like typing.Union
+    return get_origin(annotation) in (Union, UnionType) and all(arg in (int, float) for arg in get_args(annotation))
 
 def is_select(annotation: type):
     return inspect.isclass(annotation) and issubclass(annotation, Enum) 
 
 def is_file(annotation: type):
     
-    return inspect.isclass(annotation) and issubclass(annotation, Base64File) 
+    return inspect.isclass(annotation) and issubclass(annotation, (Base64File, BinaryFile)) 
 
 def is_literal(annotation: type):
     return get_origin(annotation) == Literal
@@ -98,219 +122,1038 @@ def get_validation_rules(field_name: str, field: FieldInfo):
         validation_rules.append(Required(error_text=f'{field_name} is required.'))
     return validation_rules
 
+def get_max_file_size(field: FieldInfo)->Optional[int]:
+    schema_data = field.json_schema_extra if isinstance(field.json_schema_extra, dict) else {}
+    max_file_size = schema_data.get('max_file_size')
+    return None if max_file_size is PydanticUndefined else max_file_size
+
+def file_size(file: Base64File|BinaryFile)->Optional[int]:
+    """Size of the content of a file that is not stored yet, without decoding or reading it."""
+    if isinstance(file, BinaryFile):
+        if isinstance(file.data, (bytes, bytearray)):
+            return len(file.data)
+        if isinstance(file.data, SpooledFile):
+            return file.data.size
+        # the declared size of an upload that was not attached yet, stored files are not checked again
+        return file.size if file.data is not None or not file.path else None
+    return b64decoded_size(file.data) if isinstance(file.data, str) else None
+
+def file_state(file: Base64File|BinaryFile)->tuple[dict, Optional[dict]]:
+    """Copy of the attributes of a file, including the private content of a `BinaryFile`."""
+    private = file.__pydantic_private__
+    return dict(file.__dict__), dict(private) if private is not None else None
+
+def restore_file_state(file: Base64File|BinaryFile, state: tuple[dict, Optional[dict]]):
+    file.__dict__.update(state[0])
+    if state[1] is not None:
+        file.__pydantic_private__.update(state[1])
+
+def get_additional_validation_rules(field: FieldInfo)->list[ValidationRule]:
+    # validation rules passed to FField
+    schema_data = field.json_schema_extra if isinstance(field.json_schema_extra, dict) else {}
+    rules = schema_data.get('validation_rules', None) or []
+    return [rule if isinstance(rule, ValidationRule) else ValidationRule.model_validate(rule) for rule in rules]
+
 def to_form_field(field_name: str, field: FieldInfo)->FormField:
+    if not hooks:
+        return build_form_field(field_name, field)
+    start = time.perf_counter()
+    form_field = build_form_field(field_name, field)
+    emit('definition.field', time.perf_counter() - start, field=field_name, kind=form_field.field_type if form_field else None)
+    return form_field
+
+def build_form_field(field_name: str, field: FieldInfo)->FormField:
     annotation = field.annotation
     field_schema = field.json_schema_extra
     
     if field_schema is None:
         field_schema = {}
-    validation_rules = get_validation_rules(field_schema.get('label', field_name), field)
-    logger.info(f'schema: {field_schema}')
+    # FField passes unset options along as PydanticUndefined, which is not serializable
+    field_schema = {key: value for key, value in field_schema.items() if value is not PydanticUndefined}
+    validation_rules = get_validation_rules(field_schema.get('label', field_name), field) + get_additional_validation_rules(field)
     field_definition = {
         'name': field_name,
-        'validation_rules': validation_rules,
-        'default': field.default,
-        'meta': field.json_schema_extra
-    } | field_schema
-    logger.debug(f'{field_name} = annotation: {annotation}, schema: {field_definition}, validation rules: {validation_rules}')
+        'default': None if field.default is PydanticUndefined else field.default,
+        'meta': field_schema
+    } | field_schema | {'validation_rules': validation_rules}
+    logger.debug('%s = annotation: %s, schema: %s, validation rules: %s', field_name, annotation, field_definition, validation_rules)
     
     try:
         annotation = unpack_annotation(annotation)
-        if is_custom(annotation):
-            inner_annotation = unpack_with_custom_annotation(annotation)
-            choices = []
-            if is_select(inner_annotation):
-                for enum_member in inner_annotation:
-                    choices.append(enum_member.value)
-            return CustomField.model_validate(field_definition | {'choices': choices})
-        elif is_datetime(annotation):
-            return DateTimeField.model_validate(field_definition)
-        elif is_select(annotation):
-            choices = []
-            for enum_member in annotation:
-                choices.append(enum_member.value)
-            return SelectField.model_validate(field_definition | {'choices': choices})
-        elif is_file(annotation):
-            return FileField.model_validate(field_definition)
-        elif is_list(annotation):
-            list_item_type = get_list_item_type(annotation)
-            field_info = field.from_annotated_attribute(list_item_type, default=None)
-            field_definition['item_definition'] = to_form_field(field_name + '_item', field_info) 
-            return ListField.model_validate(field_definition)
-        elif is_object(annotation):
-            field_definition['item_properties'] = get_object_type(annotation).get_form_fields() 
-            return ObjectField.model_validate(field_definition)
-        elif is_dict(annotation):
-            logger.warning(f'dict is currently not supported')
-            return None
-        elif is_number(annotation):
-            return NumberField.model_validate(field_definition)
-        elif is_text(annotation):
-            return TextField.model_validate(field_definition)
-        elif is_literal(annotation):
-            return TextField.model_validate(field_definition | {'rendered': False})
-        elif is_boolean(annotation):
-            return BooleanField.model_validate(field_definition)
-        else:
+        kind = classify(annotation)
+        builder = classifier.get_builder(kind) if kind is not None else None
+        if builder is None:
             raise InvalidDefinitionException(f'Invalid field annotation {field_name}: {annotation}')
+        return builder(annotation, field_name, field, field_definition)
     except InvalidDefinitionException as e:
         e.message = f'Invalid field {field_name}: {e.message}'
         raise e
 
+def get_choices(annotation: type):
+    if classify(annotation) == FieldKind.SELECT:
+        return list(index_for_enum(annotation).choices)
+    return []
+
+def choices_definition(annotation: type, field_definition: dict)->dict:
+    if field_definition.get('indexed_choices') and classify(annotation) == FieldKind.SELECT:
+        return {'choices': None, 'choices_index': index_for_enum(annotation).name}
+    return {'choices': get_choices(annotation)}
+
+def build_custom_field(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+    inner_annotation = unpack_with_custom_annotation(annotation)
+    return CustomField.model_validate(field_definition | choices_definition(inner_annotation, field_definition))
+
+def build_select_field(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+    return SelectField.model_validate(field_definition | choices_definition(annotation, field_definition))
+
+def build_list_field(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+    list_item_type = get_list_item_type(annotation)
+    field_info = field.from_annotated_attribute(list_item_type, default=None)
+    field_definition['item_definition'] = to_form_field(field_name + '_item', field_info) 
+    return ListField.model_validate(field_definition)
+
+def build_object_field(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+    sub_form = get_object_type(annotation)
+    if _ref_mode.get():
+        field_definition['ref'] = get_ref_name(sub_form)
+        field_definition['item_properties'] = []
+    else:
+        field_definition['item_properties'] = sub_form.get_form_fields()
+    return ObjectField.model_validate(field_definition)
+
+def build_dict_field(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+    logger.warning('dict is currently not supported')
+    return None
+
+def build_file_field(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+    if issubclass(annotation, BinaryFile):
+        field_definition['transfer'] = FileTransfer.BINARY
+    if field_definition.get('chunked_upload') and not field_definition.get('chunk_size'):
+        field_definition['chunk_size'] = DEFAULT_UPLOAD_CHUNK_SIZE
+    return FileField.model_validate(field_definition)
+
+def build_literal_field(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+    return TextField.model_validate(field_definition | {'rendered': False})
+
+def form_field_builder(form_field_class: Type[FormField]):
+    def build(annotation: type, field_name: str, field: FieldInfo, field_definition: dict):
+        return form_field_class.model_validate(field_definition)
+    return build
+
 def to_multipart_form_field(field_name: str, field: FieldInfo):
     annotation = field.annotation
     try:
         annotation = unpack_with_custom_annotation(annotation)
-        if is_object(annotation):
+        kind = classify(annotation)
+        if kind == FieldKind.OBJECT:
             pass
-        elif is_list(annotation):
+        elif kind == FieldKind.LIST:
             pass
-        elif is_file(annotation):
+        elif kind == FieldKind.FILE:
             pass
         
     except InvalidDefinitionException as e:
         e.message = f'Invalid field {field_name}: {e.message}'
         raise e
 
+
+# bumped by clear_form_definition_cache, which invalidates the caches of all classes.
+# A model rebuild only drops the caches of the model and of the forms that embed it.
+_definition_generation = 0
+
+# per class caches, all of them depend on the fields of the class and of its sub-forms
+_CLASS_CACHES = (
+    '__form_definition__', '__ref_form_definition__', '__ref_form_fields__', '__form_dependencies__',
+    '__rule_validator__', '__field_validators__', '__sub_forms__', '__render_evaluator__',
+    '__batch_adapter__', '__multipart_form__', '__file_plan__', '__file_limits__',
+)
+
+# set while the fields of a definition with references to sub-forms are built
+_ref_mode: ContextVar[bool] = ContextVar('ref_mode', default=False)
+# classes whose inline definition is being built, used to detect recursive models
+_building: ContextVar[frozenset] = ContextVar('building', default=frozenset())
+# classes whose file plan is being compiled in the current thread, for recursive models
+_planning: ContextVar[frozenset] = ContextVar('planning', default=frozenset())
+
+_ref_names: dict[type, str] = {}
+_ref_models: dict[str, type] = {}
+_ref_names_lock = threading.Lock()
+
+def get_ref_name(model: type)->str:
+    """Name of a FormModel class in the definitions table of reference definitions.
+
+    The name is `module.QualName` of the class, so it does not depend on the order in which
+    definitions are built and is the same in every process.
+    """
+    name = _ref_names.get(model)
+    if name is None:
+        with _ref_names_lock:
+            name = _ref_names.get(model)
+            if name is None:
+                name = model_name(model)
+                # only distinct classes of the same qualified name (e.g. created dynamically) get a suffix
+                suffix = 2
+                while name in _ref_models:
+                    name = f'{model_name(model)}.{suffix}'
+                    suffix += 1
+                _ref_names[model] = name
+                _ref_models[name] = model
+    return name
+
+def iter_refs(form_fields: Iterable[FormField])->Iterator[str]:
+    for form_field in form_fields:
+        if isinstance(form_field, ObjectField) and form_field.ref:
+            yield form_field.ref
+        if isinstance(form_field.item_definition, FormField):
+            yield from iter_refs((form_field.item_definition,))
+        if form_field.item_properties:
+            yield from iter_refs(item for item in form_field.item_properties if isinstance(item, FormField))
+
+def iter_data_sources(form_fields: Iterable[FormField])->Iterator[str]:
+    for form_field in form_fields:
+        if form_field.data_source:
+            yield form_field.data_source
+        if isinstance(form_field.item_definition, FormField):
+            yield from iter_data_sources((form_field.item_definition,))
+        if form_field.item_properties:
+            yield from iter_data_sources(item for item in form_field.item_properties if isinstance(item, FormField))
+
+def populate_choices(form_fields: list[FormField], choices: dict[str, Any])->list[FormField]:
+    """Copies of the fields with the resolved choices of their data sources, unchanged fields are reused."""
+    populated = []
+    for form_field in form_fields:
+        update = {}
+        if form_field.data_source in choices:
+            update['choices'] = choices[form_field.data_source]
+        if isinstance(form_field.item_definition, FormField):
+            item_definition = populate_choices([form_field.item_definition], choices)[0]
+            if item_definition is not form_field.item_definition:
+                update['item_definition'] = item_definition
+        if form_field.item_properties:
+            item_properties = populate_choices(form_field.item_properties, choices)
+            if any(new is not old for new, old in zip(item_properties, form_field.item_properties)):
+                update['item_properties'] = item_properties
+        populated.append(form_field.model_copy(update=update) if update else form_field)
+    return populated
+
+def iter_annotation_classes(annotation: Any)->Iterator[type]:
+    if inspect.isclass(annotation):
+        yield annotation
+    for arg in get_args(annotation):
+        yield from iter_annotation_classes(arg)
+
+def sub_form_of(annotation: type)->Optional[Type['FormModel']]:
+    annotation = unpack_with_custom_annotation(annotation)
+    return get_object_type(annotation) if classify(annotation) == FieldKind.OBJECT else None
+
+class FormDefinition:
+    """Cached form definition of a FormModel class.
+
+    Holds the form fields together with their serialized JSON and an ETag
+    (content hash of the JSON), so endpoints can return the cached body and
+    answer `If-None-Match` requests without rebuilding the definition.
+
+    Definitions with references (`definitions` is set) contain every sub-form once
+    in the definitions table, object fields refer to it by name (`ref`). References
+    to the form itself (`ref` of the definition) refer to its `fields`.
+    """
+    def __init__(self, fields: list[FormField], generation: int, definitions: Optional[dict[str, list[FormField]]] = None, ref: Optional[str] = None):
+        self._fields = fields
+        self._definitions = definitions
+        self.ref = ref
+        self._build: Optional[Callable[[], 'FormDefinition']] = None
+        self.generation = generation
+        if definitions is None:
+            self.json = dump_form_fields_json(fields)
+        else:
+            self.json = RefFormDefinition(ref=ref, fields=fields, definitions=definitions).model_dump_json(by_alias=True, serialize_as_any=True).encode()
+        self.etag = f'"{hashlib.sha256(self.json).hexdigest()}"'
+
+    @classmethod
+    def restore(cls, json: bytes, generation: int, build: Callable[[], 'FormDefinition'], ref: Optional[str] = None)->'FormDefinition':
+        """Definition with the JSON of a snapshot, the fields are only built by `build` when they are accessed."""
+        definition = cls.__new__(cls)
+        definition._fields = None
+        definition._definitions = None
+        definition.ref = ref
+        definition._build = build
+        definition.generation = generation
+        definition.json = json
+        definition.etag = f'"{hashlib.sha256(json).hexdigest()}"'
+        return definition
+
+    def _load(self):
+        built = self._build()
+        self._fields, self._definitions, self._build = built._fields, built._definitions, None
+
+    @property
+    def fields(self)->list[FormField]:
+        if self._build is not None:
+            self._load()
+        return self._fields
+
+    @property
+    def definitions(self)->Optional[dict[str, list[FormField]]]:
+        if self._build is not None:
+            self._load()
+        return self._definitions
+
+    @property
+    def restored(self)->bool:
+        """Whether the definition was restored from a snapshot and its fields were not built yet."""
+        return self._build is not None
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an `If-None-Match` header value matches this definition's ETag."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return self.etag in tags
+
+def read_stored_file(file: Base64File|BinaryFile, storage: FileStorage, key: str, chunk_size: int, lazy: bool):
+    local_path = storage.local_path(key)
+    # only files on the local file system can be loaded lazily
+    if lazy and local_path is not None:
+        file.data = local_path if isinstance(file, BinaryFile) else LazyFileData(local_path, chunk_size)
+        if isinstance(file, BinaryFile):
+            file.size = local_path.stat().st_size
+        return
+    if isinstance(file, BinaryFile):
+        file.data = storage.read(key)
+        file.size = size = len(file.data)
+    else:
+        with storage.open(key) as f:
+            file.data = ''.join(b64encode_from_stream(f, chunk_size))
+        size = len(file.data) * 3 // 4 - file.data[-2:].count('=')
+    if hooks:
+        emit('file.read', file=file.name, bytes=size)
+
 class FormModel(BaseSchema):
+    # total size of the files of a form in bytes, set with the `max_form_size` class argument
+    __max_form_size__: ClassVar[Optional[int]] = None
+
+    def __init_subclass__(cls, register: bool = True, form_name: Optional[str] = None, max_form_size: Optional[int] = None, **kwargs):
+        super().__init_subclass__(**kwargs)
+
     @classmethod
-    def get_form_fields(cls)->list[FormField]:
+    def __pydantic_init_subclass__(cls, register: bool = True, form_name: Optional[str] = None, max_form_size: Optional[int] = None, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        if max_form_size is not None:
+            cls.__max_form_size__ = max_form_size
+        if register:
+            form_registry.register(cls, form_name)
+        else:
+            form_registry.track(cls)
+
+    @classmethod
+    def build_form_fields(cls)->list[FormField]:
         fields = []
         for field_name, field_info in cls.model_fields.items():
             form_field = to_form_field(field_name, field_info)
             if form_field:
                 fields.append(form_field)
         return fields
+
+    @classmethod
+    def get_form_definition(cls, refs: bool = False)->FormDefinition:
+        """Cached form definition of this class.
+
+        With `refs`, every sub-form is contained once in the definitions table and object fields
+        refer to it by name, which also supports recursive models. By default sub-forms are inlined.
+        """
+        # looked up in the class __dict__ so subclasses never reuse the definition of their parent
+        cache_name = '__ref_form_definition__' if refs else '__form_definition__'
+        definition: Optional[FormDefinition] = cls.__dict__.get(cache_name)
+        if definition is None or definition.generation != _definition_generation:
+            if not hooks:
+                definition = cls.build_form_definition(refs)
+            else:
+                emit('definition.cache_miss', model=cls.__name__)
+                start = time.perf_counter()
+                definition = cls.build_form_definition(refs)
+                emit('definition.build', time.perf_counter() - start, model=cls.__name__, fields=len(definition.fields))
+            setattr(cls, cache_name, definition)
+        elif hooks:
+            emit('definition.cache_hit', model=cls.__name__)
+        return definition
+
+    @classmethod
+    def build_form_definition(cls, refs: bool = False)->FormDefinition:
+        if refs:
+            fields = cls.get_ref_form_fields()
+            ref = get_ref_name(cls)
+            definitions = {}
+            pending = list(iter_refs(fields))
+            while pending:
+                name = pending.pop(0)
+                # the fields of the form itself are not repeated in the table
+                if name in definitions or name == ref:
+                    continue
+                definitions[name] = _ref_models[name].get_ref_form_fields()
+                pending += iter_refs(definitions[name])
+            return FormDefinition(fields, _definition_generation, definitions, ref)
+        building = _building.get()
+        if cls in building:
+            raise InvalidDefinitionException(f'{cls.__name__} is recursive and can only be represented as definition with references (refs=True)')
+        token = _building.set(building | {cls})
+        try:
+            return FormDefinition(cls.build_form_fields(), _definition_generation)
+        finally:
+            _building.reset(token)
+
+    @classmethod
+    def get_ref_form_fields(cls)->list[FormField]:
+        """Fields of this class with references to sub-forms instead of their inlined fields."""
+        fields = cls.__dict__.get('__ref_form_fields__')
+        if fields is None or fields[0] != _definition_generation:
+            token = _ref_mode.set(True)
+            try:
+                fields = (_definition_generation, cls.build_form_fields())
+            finally:
+                _ref_mode.reset(token)
+            cls.__ref_form_fields__ = fields
+        return fields[1]
+
+    @classmethod
+    def get_form_fields(cls)->list[FormField]:
+        """The cached form fields. They are shared and frozen, `model_copy(update=...)` returns changed copies."""
+        return list(cls.get_form_definition().fields)
+
+    @classmethod
+    async def aresolve_form_fields(cls, registry: Optional[DataSourceRegistry] = None)->list[FormField]:
+        """Form fields with the choices of their data sources, all data sources are resolved concurrently."""
+        registry = registry or data_sources
+        form_fields = cls.get_form_fields()
+        choices = await registry.resolve_many(iter_data_sources(form_fields))
+        return populate_choices(form_fields, choices)
+
+    @classmethod
+    def resolve_form_fields(cls, registry: Optional[DataSourceRegistry] = None)->list[FormField]:
+        registry = registry or data_sources
+        form_fields = cls.get_form_fields()
+        choices = registry.resolve_many_sync(iter_data_sources(form_fields))
+        return populate_choices(form_fields, choices)
+
+    @classmethod
+    def get_rule_validator(cls)->RuleValidator:
+        validator = cls.__dict__.get('__rule_validator__')
+        if validator is None or validator[0] != _definition_generation:
+            rules = {}
+            executed_rules = {}
+            for field_name, field_info in cls.model_fields.items():
+                field_schema = field_info.json_schema_extra if isinstance(field_info.json_schema_extra, dict) else {}
+                label = field_schema.get('label')
+                # FField passes an unset label as PydanticUndefined
+                label = field_name if not label or label is PydanticUndefined else label
+                generated_rules = get_validation_rules(label, field_info)
+                additional_rules = get_additional_validation_rules(field_info)
+                rules[field_name] = generated_rules + additional_rules
+                executed_rules[field_name] = [rule for rule in generated_rules if rule.name not in CONSTRAINT_RULES] + additional_rules
+            validator = (_definition_generation, RuleValidator(cls, rules, executed_rules))
+            cls.__rule_validator__ = validator
+        return validator[1]
+
+    @classmethod
+    def get_field_validator(cls, path: str)->FieldValidator:
+        """Cached validator of the field (or list item) at a path like `address.zip_code` or `items[3].file`."""
+        validators = cls.__dict__.get('__field_validators__')
+        if validators is None or validators[0] != _definition_generation:
+            validators = (_definition_generation, {})
+            cls.__field_validators__ = validators
+        parts = parse_path(path)
+        # keyed by the parsed path, spellings of the same path and all items of a list share their validator
+        key = tuple(None if isinstance(part, int) else part for part in parts)
+        validator = validators[1].get(key)
+        if validator is None:
+            validator = validators[1][key] = cls.build_field_validator(parts)
+        return validator
+
+    @classmethod
+    def build_field_validator(cls, parts: tuple)->FieldValidator:
+        owner, field_name, field_info, annotation, owner_depth = cls, None, None, None, 0
+        for position, part in enumerate(parts):
+            if isinstance(part, int):
+                if annotation is None or classify(annotation) != FieldKind.LIST:
+                    raise FormModelException(f'{format_path(parts[:position])} of {cls.__name__} is not a list')
+                annotation = get_list_item_type(annotation)
+                field_info = None
+                continue
+            if annotation is not None:
+                sub_form = unpack_with_custom_annotation(annotation)
+                if classify(sub_form) != FieldKind.OBJECT:
+                    raise FormModelException(f'{format_path(parts[:position])} of {cls.__name__} is not a sub-form')
+                owner, owner_depth = sub_form, position
+            field_name = owner.get_rule_validator().field_name(part)
+            if field_name not in owner.model_fields:
+                raise FormModelException(f'{cls.__name__} has no field {format_path(parts[:position + 1])}')
+            field_info = owner.model_fields[field_name]
+            annotation = unpack_with_custom_annotation(field_info.annotation)
+        if field_info is None:
+            # a list item, validated by the item annotation without the rules of the list field
+            return FieldValidator(annotation, {}, [], {}, owner_depth, sub_form_of(annotation))
+        rule_validator = owner.get_rule_validator()
+        executed_rules = [rule for name, rule, _ in rule_validator.checks if name == field_name]
+        # only the constraints of the field, its other attributes have no effect outside of a model
+        annotation = Annotated[(field_info.annotation, *field_info.metadata)] if field_info.metadata else field_info.annotation
+        return FieldValidator(annotation, rule_validator.rules.get(field_name, {}), executed_rules, rule_validator.aliases, owner_depth, sub_form_of(field_info.annotation))
+
+    @classmethod
+    def validate_field(cls, path: str, value: Any, values: Any = None)->FieldValidationResult:
+        """Validate a single value at a field path against the field's type, constraints and validation rules.
+
+        `values` is the (partial) payload of the whole form, rules that refer to other fields read them from it.
+        """
+        validator = cls.get_field_validator(path)
+        siblings = None
+        if values is not None and validator.checks:
+            siblings = compile_accessor(parse_path(path)[:validator.owner_depth])(values) if validator.owner_depth else values
+            if not isinstance(siblings, (dict, BaseModel)):
+                siblings = None
+        errors = validator.validate(value, siblings)
+        return FieldValidationResult(path=path, valid=not errors, errors=errors)
+
+    @classmethod
+    def get_sub_forms(cls)->dict[str, tuple[Type['FormModel'], bool]]:
+        """Sub-form fields of this class: `field name -> (FormModel class, is list of sub-forms)`."""
+        sub_forms = cls.__dict__.get('__sub_forms__')
+        if sub_forms is None or sub_forms[0] != _definition_generation:
+            fields = {}
+            for field_name, field_info in cls.model_fields.items():
+                annotation = unpack_with_custom_annotation(field_info.annotation)
+                is_list_field = classify(annotation) == FieldKind.LIST
+                if is_list_field:
+                    annotation = unpack_annotation(get_list_item_type(annotation))
+                if classify(annotation) == FieldKind.OBJECT:
+                    fields[field_name] = (get_object_type(annotation), is_list_field)
+            sub_forms = (_definition_generation, fields)
+            cls.__sub_forms__ = sub_forms
+        return sub_forms[1]
+
+    @classmethod
+    def get_sub_form(cls, field_name: str)->Optional[Type['FormModel']]:
+        """The FormModel class of a sub-form field (or of the items of a list of sub-forms)."""
+        sub_form = cls.get_sub_forms().get(field_name)
+        return sub_form[0] if sub_form else None
+
+    @classmethod
+    def get_render_evaluator(cls)->RenderEvaluator:
+        evaluator = cls.__dict__.get('__render_evaluator__')
+        if evaluator is None or evaluator[0] != _definition_generation:
+            evaluator = (_definition_generation, RenderEvaluator(build_conditions(cls)))
+            cls.__render_evaluator__ = evaluator
+        return evaluator[1]
+
+    @classmethod
+    def hidden_fields(cls, values: Any)->set[str]:
+        """Paths of the fields that are hidden by their render conditions for the given values (instance or raw data)."""
+        return cls.get_render_evaluator().hidden_fields(values)
+
+    @classmethod
+    def strip_hidden_fields(cls, data: dict)->dict:
+        """Copy of the raw payload without the values of fields that are hidden by their render conditions."""
+        return cls.get_render_evaluator().strip_hidden(data)
+
+    @model_validator(mode='after')
+    def validate_rules(self):
+        cls = type(self)
+        evaluator = cls.get_render_evaluator()
+        # the rules of hidden fields are skipped
+        hidden = evaluator.hidden_fields(self) if evaluator.conditions else ()
+        cls.get_rule_validator().raise_for_errors(self, skip=hidden)
+        return self
+
+    @model_validator(mode='after')
+    def validate_file_sizes(self):
+        cls = type(self)
+        limits = cls.get_file_limits()
+        for field_name, limit in limits.items():
+            value = getattr(self, field_name)
+            for file in (value if isinstance(value, list) else (value,)):
+                size = file_size(file) if file else None
+                if size is not None and size > limit:
+                    raise PydanticCustomError('file_too_large', '{name} is larger than the maximum file size of {limit} bytes', {'name': file.name, 'field': field_name, 'limit': limit})
+        if cls.__max_form_size__ is not None:
+            total = sum(file_size(file) or 0 for file in self.file_data_fields())
+            if total > cls.__max_form_size__:
+                raise PydanticCustomError('form_too_large', 'The files of the form are larger than the maximum form size of {limit} bytes', {'limit': cls.__max_form_size__})
+        return self
+
+    @classmethod
+    def validate_many(cls, items: Iterable[Any])->list[dict[str, list[str]]]:
+        """Validate many submissions, returns the `error_text`s of each submission by field path (empty if valid)."""
+        return validate_many(cls, items)
+
+    @classmethod
+    def get_batch_adapter(cls)->TypeAdapter:
+        adapter = cls.__dict__.get('__batch_adapter__')
+        if adapter is None or adapter[0] != _definition_generation:
+            adapter = (_definition_generation, TypeAdapter(cls))
+            cls.__batch_adapter__ = adapter
+        return adapter[1]
+
+    @classmethod
+    def validate_batch(cls, items: Iterable[Any])->BatchValidationResult:
+        """Validate many raw submissions, returns the valid instances and the errors of the failed rows."""
+        return validate_batch(cls, items)
+
+    @classmethod
+    def iter_validate_batches(cls, items: Iterable[Any], batch_size: int = DEFAULT_BATCH_SIZE)->Iterator[BatchValidationResult]:
+        """Validate raw submissions in chunks of `batch_size` and yield the result of every chunk."""
+        return iter_validate_batches(cls, items, batch_size)
+
+    @classmethod
+    def form_dependencies(cls)->set[Type['FormModel']]:
+        """FormModel classes used in the field annotations of this class, i.e. the sub-forms its definition embeds."""
+        dependencies = cls.__dict__.get('__form_dependencies__')
+        if dependencies is None or dependencies[0] != _definition_generation:
+            models = {
+                annotation
+                for field_info in cls.model_fields.values()
+                for annotation in iter_annotation_classes(field_info.annotation)
+                if issubclass(annotation, FormModel)
+            }
+            # unresolved forward references are not in the annotations yet
+            if not cls.__pydantic_complete__:
+                return models
+            dependencies = (_definition_generation, models)
+            cls.__form_dependencies__ = dependencies
+        return dependencies[1]
+
+    @classmethod
+    def clear_form_definition_cache(cls):
+        global _definition_generation
+        _definition_generation += 1
+
+    @classmethod
+    def invalidate_form_definition(cls):
+        """Drop the cached definitions of this class and of all forms that embed it."""
+        for model in (cls, *form_registry.dependents(cls)):
+            for cache_name in _CLASS_CACHES:
+                if cache_name in model.__dict__:
+                    delattr(model, cache_name)
+        if hooks:
+            emit('definition.invalidate', model=cls.__name__)
+
+    @classmethod
+    def model_rebuild(cls, *, force: bool = False, raise_errors: bool = True, _parent_namespace_depth: int = 2, _types_namespace: Optional[dict[str, Any]] = None):
+        cls.invalidate_form_definition()
+        return super().model_rebuild(
+            force=force,
+            raise_errors=raise_errors,
+            _parent_namespace_depth=_parent_namespace_depth + 1,
+            _types_namespace=_types_namespace
+        )
     
     @classmethod
     def as_multipart_form(cls):
-        def __init__(self, **kwargs):
-            # constructor for dynamically created classes.
-            for k,v in kwargs.items():
-                setattr(self, k, v)
-        parameters = []
-        annotations = {}
+        # generated classes are cached per model class, so the same class is returned for every call
+        multipart_form = cls.__dict__.get('__multipart_form__')
+        if multipart_form is None or multipart_form[0] != _definition_generation:
+            multipart_form = (_definition_generation, cls.build_multipart_form())
+            cls.__multipart_form__ = multipart_form
+        return multipart_form[1]
+
+    @classmethod
+    def build_multipart_form(cls):
+        # FastAPI is only imported when a multipart form is built
+        from .multipart import build_multipart_form
+        return build_multipart_form(cls)
+
+    def save_file(self, directory: Optional[PathLike], file: Base64File|BinaryFile, chunk_size: int = DEFAULT_CHUNK_SIZE, storage: Optional[FileStorage] = None, uploads: Optional[UploadManager] = None):
+        storage = storage or DirectoryStorage(directory)
+        if file.upload_id and not file.data and uploads is not None:
+            self.save_uploaded_file(file, storage, uploads, chunk_size)
+            return
+        if isinstance(file, BinaryFile):
+            self.save_binary_file(file, storage, chunk_size)
+            return
+        file_data = file
+        file_data = Base64FileData.model_validate(file_data)
+        if file_data.data:
+            if isinstance(file_data.data, LazyFileData):
+                # lazy data is already stored on disk, store it without encoding and decoding it again
+                key = storage.save_path(file_data.name, file_data.data.path)
+                written = Path(file_data.data.path).stat().st_size
+            else:
+                written = 0
+                def write(stream):
+                    nonlocal written
+                    written = b64decode_to_stream(file_data.data, stream, chunk_size)
+                key = storage.save(file_data.name, write)
+            if hooks:
+                emit('file.write', file=file_data.name, bytes=written)
+            file.path = key
+
+    def save_binary_file(self, file: BinaryFile, storage: FileStorage, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if file.data is None:
+            return
+        if isinstance(file.data, (str, PathLike)):
+            key = storage.save_path(file.name, file.data)
+            written = Path(file.data).stat().st_size
+        elif isinstance(file.data, SpooledFile) and not file.data.in_memory:
+            # the spooled temporary file is moved into place instead of being copied,
+            # a rolled back transaction moves it back
+            written = file.data.size
+            file.data.close()
+            key = storage.move_path(file.name, file.data.path)
+        else:
+            written = 0
+            def write(stream):
+                nonlocal written
+                written = file.copy_to(stream, chunk_size)
+            key = storage.save(file.name, write)
+        if hooks:
+            emit('file.write', file=file.name, bytes=written)
+        # the content is read from the storage from now on, uploaded streams can be closed
+        local_path = storage.local_path(key)
+        file.data = local_path if local_path is not None else storage.read(key)
+        file.path = key
+        file.size = written
+
+    def save_uploaded_file(self, file: Base64File|BinaryFile, storage: FileStorage, uploads: UploadManager, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        source = uploads.path(file.upload_id)
+        size = source.stat().st_size
+        # the assembled upload is moved into the storage without reading it again
+        key = storage.move_path(file.name, source)
+        if isinstance(storage, StorageTransaction):
+            # a rolled back transaction moves the file back into the upload
+            storage.on_commit(lambda upload_id=file.upload_id: uploads.release(upload_id))
+        else:
+            uploads.release(file.upload_id)
+        if hooks:
+            emit('file.write', file=file.name, bytes=size)
+        file.path = key
+        file.upload_id = None
+        local_path = storage.local_path(key)
+        if isinstance(file, BinaryFile):
+            file.data = local_path if local_path is not None else storage.read(key)
+            file.size = size
+        else:
+            read_stored_file(file, storage, key, chunk_size, lazy=True)
+
+    @classmethod
+    def get_file_plan(cls)->list[tuple[str, FieldKind, bool]]:
+        """Paths of this model that can hold files: `(field name, FILE or OBJECT, is list)`.
+
+        Compiled once per class, sub-forms without any file fields are left out.
+        """
+        plan = cls.__dict__.get('__file_plan__')
+        if plan is None or plan[0] != _definition_generation:
+            # only the finished plan is published, other threads compile their own until then
+            token = _planning.set(_planning.get() | {cls})
+            try:
+                plan = (_definition_generation, cls.build_file_plan())
+            finally:
+                _planning.reset(token)
+            cls.__file_plan__ = plan
+        return plan[1]
+
+    @classmethod
+    def build_file_plan(cls)->list[tuple[str, FieldKind, bool]]:
+        plan = []
         for field_name, field_info in cls.model_fields.items():
             annotation = unpack_with_custom_annotation(field_info.annotation)
-            field_annotation = Annotated[annotation, Form(...)]
-            if is_object(annotation):
-                sub_form = get_object_type(annotation).as_multipart_form()
-                field_annotation = Annotated[sub_form, Depends()]
-                # parameter_default = Depends(...)
-            elif is_list(annotation):
-                list_item_type = get_list_item_type(annotation)
-                if is_object(list_item_type) or is_list(list_item_type):
-                    raise InvalidDefinitionException(f'Field "{field_name}" in {cls.__name__}: Nested lists and lists of complex objects are not supported.')
-                if is_file(list_item_type):
-                    field_annotation = Annotated[list[bytes], list[UploadFile(...)]]
+            is_list_field = classify(annotation) == FieldKind.LIST
+            if is_list_field:
+                annotation = unpack_annotation(get_list_item_type(annotation))
+            kind = classify(annotation)
+            if kind == FieldKind.FILE:
+                plan.append((field_name, kind, is_list_field))
+            elif kind == FieldKind.OBJECT:
+                sub_form = get_object_type(annotation)
+                # a recursive model that is still being compiled may contain files
+                if sub_form in _planning.get() or sub_form.get_file_plan():
+                    plan.append((field_name, kind, is_list_field))
+        return plan
+
+    @classmethod
+    def get_file_limits(cls)->dict[str, int]:
+        """`max_file_size` of the file fields of this class (without sub-forms) that declare one."""
+        limits = cls.__dict__.get('__file_limits__')
+        if limits is None or limits[0] != _definition_generation:
+            limits = (_definition_generation, {
+                field_name: get_max_file_size(cls.model_fields[field_name])
+                for field_name, kind, _ in cls.get_file_plan()
+                if kind == FieldKind.FILE and get_max_file_size(cls.model_fields[field_name]) is not None
+            })
+            cls.__file_limits__ = limits
+        return limits[1]
+
+    def iter_file_limits(self)->Iterator[tuple[Base64File|BinaryFile, Optional[int]]]:
+        """The files of this form together with the `max_file_size` of their field."""
+        limits = type(self).get_file_limits()
+        for field_name, kind, is_list_field in type(self).get_file_plan():
+            value = getattr(self, field_name)
+            if not value:
+                continue
+            for item in (value if is_list_field else (value,)):
+                if not item:
+                    continue
+                if kind == FieldKind.FILE:
+                    yield item, limits.get(field_name)
                 else:
-                    field_annotation = Annotated[list[list_item_type], list[Form(...)]]
-                
-            elif is_file(annotation):
-                field_annotation = Annotated[bytes, UploadFile(...)]
-            elif is_text(annotation):
-                pass
-            elif is_number(annotation):
-                pass
-            elif is_boolean(annotation):
-                pass
-            elif is_select(annotation):
-                pass
+                    yield from item.iter_file_limits()
+
+    def check_upload_sizes(self, uploads: UploadManager):
+        """Enforce `max_file_size` and `max_form_size` for the files of chunked uploads.
+
+        Their size is only known to `uploads`, so validation can't check them. Raises a
+        `FileTooLargeException` before any file is saved.
+        """
+        total = 0
+        has_uploads = False
+        for file, limit in self.iter_file_limits():
+            if file.upload_id and not file.data:
+                size = uploads.status(file.upload_id).size
+                if limit is not None and size > limit:
+                    raise FileTooLargeException(f'{file.name} is larger than the maximum file size of {limit} bytes', limit)
+                has_uploads = True
             else:
-                raise InvalidDefinitionException(f'Invalid field definition {field_name}: {annotation}')
-            annotations[field_name] = field_annotation
-            # inspect.Parameter(inspect.Parameter.)
-            parameters.append(
-                inspect.Parameter(
-                    name=field_name,
-                    kind=inspect.Parameter.POSITIONAL_OR_KEYWORD,
-                    default=inspect.Parameter.empty,
-                    annotation=field_annotation
-                )
-            )
-        class_name = f'Multipart{cls.__name__}'
-        create_parameters = {
-            '__init__': __init__,
-            '__annotations__': annotations,
-            '__signature__': inspect.Signature(parameters)
-        }
-        print(f'Signature: {inspect.Signature(parameters)}')
-        print(f'Create {class_name} as {create_parameters}')
-        return type(class_name,(object,),create_parameters )
-
-    def save_file(self, directory: PathLike, file: Base64File):
-        file_data = file
-        file_data = Base64FileData.model_validate(file_data)
-        if file_data.data:
-            file_path = Path(f'{directory}/{file_data.name}').as_posix()
-            with open(file_path, 'wb') as f:
-                f.write(base64.b64decode(file_data.data))
-            file.path = file_path
-
-    def file_data_fields(self):
-        file_data_fields = []
-        for field_name, field_info in self.model_fields.items():
-            annotation = field_info.annotation
-            annotation = unpack_with_custom_annotation(annotation)
-            
-            if is_list(annotation):
-                list_item_type = get_list_item_type(annotation)
-                if is_union(list_item_type):
-                    list_item_type = unpack_annotation(list_item_type)
-                logger.debug(f'list with child item type: {list_item_type}')
-                if is_file(list_item_type):
-
-                    for file_data in getattr(self, field_name):
-                        file_data_fields.append(file_data)
-                elif is_object(list_item_type):
-                    for item in getattr(self, field_name):
-                        file_data_fields += item.file_data_fields()
-            elif is_file(annotation):
-                file_data: Base64File = getattr(self, field_name)
-                if file_data:
-                    file_data_fields.append(file_data)
-            elif is_object(annotation):
-                if getattr(self, field_name):
-                    file_data_fields += getattr(self, field_name).file_data_fields()
-        return file_data_fields
+                size = file_size(file) or 0
+            total += size
+        max_form_size = type(self).__max_form_size__
+        if has_uploads and max_form_size is not None and total > max_form_size:
+            raise FileTooLargeException(f'The files of the form are larger than the maximum form size of {max_form_size} bytes', max_form_size)
+
+    def file_data_fields(self)->Iterator[Base64File|BinaryFile]:
+        for field_name, kind, is_list_field in type(self).get_file_plan():
+            value = getattr(self, field_name)
+            if not value:
+                continue
+            for item in (value if is_list_field else (value,)):
+                if not item:
+                    continue
+                if kind == FieldKind.FILE:
+                    yield item
+                else:
+                    yield from item.file_data_fields()
+
+    def attach_files(self, files: dict[str, Any]):
+        """Attach the content of binary files by file name, e.g. the uploads of a multipart request."""
+        for file_data_field in self.file_data_fields():
+            if isinstance(file_data_field, BinaryFile) and file_data_field.name in files:
+                file_data_field.attach(files[file_data_field.name])
+        return self
+
+    def ingest_files(self, files: dict[str, Any], threshold: int = DEFAULT_SPOOL_THRESHOLD, directory: Optional[PathLike] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Spool the content of binary files by file name while enforcing the size limits.
+
+        Like `attach_files`, but every upload is read into a `SpooledFile` (in memory up to `threshold`
+        bytes, in a temporary file in `directory` above). Content beyond the `max_file_size` of its
+        field or the `max_form_size` of the form raises a `FileTooLargeException` as soon as the limit
+        is exceeded, and the files spooled so far are discarded.
+        """
+        budget = SizeBudget(type(self).__max_form_size__)
+        spooled = []
+        try:
+            for file, limit in self.iter_file_limits():
+                if isinstance(file, BinaryFile) and file.name in files:
+                    content = spool_stream(files[file.name], file.name, limit, threshold, directory, budget, chunk_size)
+                    spooled.append(content)
+                    file.attach(content)
+        except BaseException:
+            for content in spooled:
+                content.discard()
+            raise
+        return self
 
     def remove_file_data(self):
         for file_data_field in self.file_data_fields():
             file_data_field.data = None
         return self
     
-    def load_files(self, allow_not_stored: bool = True):
-        for file_field in self.file_data_fields():
+    def _load_files_operation(self, allow_not_stored: bool, chunk_size: int, lazy: bool, storage: Optional[FileStorage]):
+        storage = storage or DirectoryStorage()
+        def load(file_field: Base64File|BinaryFile):
             if not file_field.path:
                 if allow_not_stored:
                     logger.warning(f'{file_field.name} has no stored path. skipping')
-                    continue
+                    return
                 raise Exception(f'{file_field.name} has no path and is not stored on disk. Consider setting allow_not_stored = True or make sure that path is set.')
-            with open(Path(file_field.path), 'rb') as f:
-                file_field.data = base64.b64encode(f.read()).decode()
+            read_stored_file(file_field, storage, file_field.path, chunk_size, lazy)
+        return load
+
+    def _load_file_data_operation(self, directory: PathLike, chunk_size: int, lazy: bool):
+        storage = DirectoryStorage(directory)
+        def load(file_data_field: Base64File|BinaryFile):
+            file_path = Path(directory).joinpath(file_data_field.name).as_posix()
+            read_stored_file(file_data_field, storage, file_path, chunk_size, lazy)
+            file_data_field.path = file_path
+        return load
+
+    def _save_files_operation(self, directory: Optional[PathLike], chunk_size: int, storage: Optional[FileStorage], uploads: Optional[UploadManager] = None):
+        storage = storage or DirectoryStorage(directory)
+        def save(file_data_field: Base64File|BinaryFile):
+            self.save_file(directory, file_data_field, chunk_size, storage, uploads)
+        return save
+
+    def _delete_files_from_directory_operation(self, directory: PathLike, missing_ok: bool):
+        def delete(file_field: Base64File|BinaryFile):
+            Path(directory).joinpath(file_field.name).unlink(missing_ok=missing_ok)
+        return delete
+
+    def _delete_files_operation(self, missing_ok: bool, storage: Optional[FileStorage]):
+        storage = storage or DirectoryStorage()
+        def delete(file_field: Base64File|BinaryFile):
+            storage.delete(file_field.path, missing_ok=missing_ok)
+        return delete
+
+    def _finish_transaction(self, action: str, files: list[Base64File|BinaryFile], previous_states: list[tuple[dict, Optional[dict]]], failures: list[FileOperationFailure], transaction: StorageTransaction, original: bool = False):
+        if not failures:
+            try:
+                transaction.commit()
+                return
+            except Exception as e:
+                # the transaction is rolled back by the failed commit
+                failures = [FileOperationFailure(file, e) for file in files]
+        else:
+            transaction.rollback()
+        for file, previous_state in zip(files, previous_states):
+            restore_file_state(file, previous_state)
+        raise_for_failures(action, failures, original)
+
+    def load_files(self, allow_not_stored: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE, lazy: bool = False, max_workers: int = 1, storage: Optional[FileStorage] = None):
+        """Load the stored files of the form, `storage` defaults to files stored at their path."""
+        failures = run_file_operation(self._load_files_operation(allow_not_stored, chunk_size, lazy, storage), self.file_data_fields(), max_workers, action='load')
+        raise_for_failures('load', failures, original=max_workers <= 1)
         return self
     
-    def load_file_data(self, directory: PathLike):
-        for file_data_field in self.file_data_fields():
-            file_path = Path(directory).joinpath(file_data_field.name)
-            with open(file_path, 'rb') as f:
-                file_data_field.data = base64.b64encode(f.read()).decode()
-            file_data_field.path = file_path.as_posix()
+    def load_file_data(self, directory: PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE, lazy: bool = False, max_workers: int = 1):
+        failures = run_file_operation(self._load_file_data_operation(directory, chunk_size, lazy), self.file_data_fields(), max_workers, action='load')
+        raise_for_failures('load', failures, original=max_workers <= 1)
         return self
 
-    def save_files(self, directory: PathLike):
-        for file_data_field in self.file_data_fields():
-            self.save_file(directory, file_data_field)
+    def iter_json(self, **dump_kwargs) -> Iterator[str]:
+        """Serialize the form to JSON and stream lazily loaded file data into the output chunk by chunk.
+
+        Keyword arguments are passed to `model_dump_json`. Can be used as body of a streaming response.
+        """
+        placeholders = LazyFilePlaceholders()
+        serialized = self.model_dump_json(context={LAZY_FILE_PLACEHOLDERS: placeholders}, **dump_kwargs)
+        yield from placeholders.stream(serialized)
+
+    def save_files(self, directory: Optional[PathLike] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, max_workers: int = 1, rollback: bool = False, storage: Optional[FileStorage] = None, uploads: Optional[UploadManager] = None, atomic: bool = False):
+        """Save all files of the form to `directory`, or to `storage` if given.
+
+        Files that refer to a finalized chunked upload (`upload_id`) are moved from `uploads`, uploads
+        beyond the size limits of the form raise a `FileTooLargeException` before any file is saved.
+
+        With the default single worker the files are saved one after another and the first error is
+        raised as it is. With more `max_workers` threads, failures are collected and raised as one
+        `FileOperationException` after all files were processed.
+
+        With `rollback`, the files are saved in one transaction of the storage (`FileStorage.transaction`):
+        for a `DirectoryStorage` they are written to temporary files and renamed into place only if all
+        files were written, so a failure leaves the stored files (including the ones that would have been
+        overwritten) unchanged and removes partially written output. The files of the form keep their
+        previous state. `atomic` additionally flushes the files to disk in one batch before they are
+        renamed into place, see `DirectoryTransaction`.
+        """
+        if uploads is not None:
+            self.check_upload_sizes(uploads)
+        storage = storage or DirectoryStorage(directory)
+        files = list(self.file_data_fields())
+        if not (rollback or atomic):
+            failures = run_file_operation(self._save_files_operation(directory, chunk_size, storage, uploads), files, max_workers, action='save')
+            raise_for_failures('save', failures, original=max_workers <= 1)
+            return self
+        previous_states = [file_state(file) for file in files]
+        transaction = storage.transaction(sync=atomic)
+        failures = run_file_operation(self._save_files_operation(directory, chunk_size, transaction, uploads), files, max_workers, action='save')
+        self._finish_transaction('save', files, previous_states, failures, transaction, original=max_workers <= 1)
         return self
     
-    def delete_files_from_directory(self, directory: PathLike, missing_ok: bool = False):
-        for file_field in self.file_data_fields():
-            file_path = Path(directory).joinpath(file_field.name)
-            file_path.unlink(missing_ok=missing_ok)
+    def delete_files_from_directory(self, directory: PathLike, missing_ok: bool = False, max_workers: int = 1):
+        failures = run_file_operation(self._delete_files_from_directory_operation(directory, missing_ok), self.file_data_fields(), max_workers, action='delete')
+        raise_for_failures('delete', failures, original=max_workers <= 1)
         return self
     
-    def delete_files(self, missing_ok: bool = False):
-        for file_field in self.file_data_fields():
-            file_path = Path(file_field.path)
-            file_path.unlink(missing_ok=missing_ok)
+    def delete_files(self, missing_ok: bool = False, max_workers: int = 1, storage: Optional[FileStorage] = None, atomic: bool = False):
+        """Delete the stored files of the form. With `atomic`, either all files are deleted or none of them."""
+        if atomic:
+            files = list(self.file_data_fields())
+            transaction = (storage or DirectoryStorage()).transaction()
+            failures = run_file_operation(self._delete_files_operation(missing_ok, transaction), files, max_workers, action='delete')
+            self._finish_transaction('delete', files, [file_state(file) for file in files], failures, transaction, original=max_workers <= 1)
+            return self
+        failures = run_file_operation(self._delete_files_operation(missing_ok, storage), self.file_data_fields(), max_workers, action='delete')
+        raise_for_failures('delete', failures, original=max_workers <= 1)
+        return self
+
+    async def aload_files(self, allow_not_stored: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE, lazy: bool = False, max_workers: int = DEFAULT_MAX_WORKERS, storage: Optional[FileStorage] = None):
+        failures = await arun_file_operation(self._load_files_operation(allow_not_stored, chunk_size, lazy, storage), self.file_data_fields(), max_workers, action='load')
+        raise_for_failures('load', failures)
+        return self
+
+    async def aload_file_data(self, directory: PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE, lazy: bool = False, max_workers: int = DEFAULT_MAX_WORKERS):
+        failures = await arun_file_operation(self._load_file_data_operation(directory, chunk_size, lazy), self.file_data_fields(), max_workers, action='load')
+        raise_for_failures('load', failures)
         return self
+
+    async def asave_files(self, directory: Optional[PathLike] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, max_workers: int = DEFAULT_MAX_WORKERS, rollback: bool = False, storage: Optional[FileStorage] = None, uploads: Optional[UploadManager] = None, atomic: bool = False):
+        if uploads is not None:
+            self.check_upload_sizes(uploads)
+        storage = storage or DirectoryStorage(directory)
+        files = list(self.file_data_fields())
+        if not (rollback or atomic):
+            failures = await arun_file_operation(self._save_files_operation(directory, chunk_size, storage, uploads), files, max_workers, action='save')
+            raise_for_failures('save', failures)
+            return self
+        import asyncio
+        previous_states = [file_state(file) for file in files]
+        transaction = storage.transaction(sync=atomic)
+        failures = await arun_file_operation(self._save_files_operation(directory, chunk_size, transaction, uploads), files, max_workers, action='save')
+        # the commit renames (and flushes) the files, which would block the event loop
+        await asyncio.to_thread(self._finish_transaction, 'save', files, previous_states, failures, transaction)
+        return self
+
+    async def adelete_files_from_directory(self, directory: PathLike, missing_ok: bool = False, max_workers: int = DEFAULT_MAX_WORKERS):
+        failures = await arun_file_operation(self._delete_files_from_directory_operation(directory, missing_ok), self.file_data_fields(), max_workers, action='delete')
+        raise_for_failures('delete', failures)
+        return self
+
+    async def adelete_files(self, missing_ok: bool = False, max_workers: int = DEFAULT_MAX_WORKERS, storage: Optional[FileStorage] = None, atomic: bool = False):
+        if atomic:
+            import asyncio
+            files = list(self.file_data_fields())
+            transaction = (storage or DirectoryStorage()).transaction()
+            failures = await arun_file_operation(self._delete_files_operation(missing_ok, transaction), files, max_workers, action='delete')
+            await asyncio.to_thread(self._finish_transaction, 'delete', files, [file_state(file) for file in files], failures, transaction)
+            return self
+        failures = await arun_file_operation(self._delete_files_operation(missing_ok, storage), self.file_data_fields(), max_workers, action='delete')
+        raise_for_failures('delete', failures)
+        return self
+
+def all_form_models(base: Type[FormModel] = FormModel)->list[Type[FormModel]]:
+    models = []
+    for subclass in base.__subclasses__():
+        models.append(subclass)
+        models += all_form_models(subclass)
+    return list(dict.fromkeys(models))
+
+def prepare_multipart_forms(models: Optional[Iterable[Type[FormModel]]] = None)->dict[Type[FormModel], type]:
+    """Build the multipart classes of `models` (default: all defined FormModel subclasses) ahead of time.
+
+    Models that can't be represented as multipart form are skipped.
+    """
+    multipart_forms = {}
+    for model in (all_form_models() if models is None else models):
+        try:
+            multipart_forms[model] = model.as_multipart_form()
+        except InvalidDefinitionException as e:
+            logger.debug('Skip multipart form of %s: %s', model.__name__, e.message)
+    return multipart_forms
+
+classifier.register(FieldKind.CUSTOM, build_custom_field, origins=(Custom,))
+classifier.register(FieldKind.DATETIME, form_field_builder(DateTimeField), types=(datetime,))
+classifier.register(FieldKind.SELECT, build_select_field, subclasses_of=(Enum,))
+classifier.register(FieldKind.FILE, build_file_field, subclasses_of=(Base64File, BinaryFile))
+classifier.register(FieldKind.LIST, build_list_field, origins=(list, collections.abc.Sequence))
+classifier.register(FieldKind.OBJECT, build_object_field, subclasses_of=(FormModel,))
+classifier.register(FieldKind.DICT, build_dict_field, types=(dict,))
+classifier.register(FieldKind.NUMBER, form_field_builder(NumberField), types=(int, float), predicate=is_number_union)
+classifier.register(FieldKind.TEXT, form_field_builder(TextField), types=(str,))
+classifier.register(FieldKind.LITERAL, build_literal_field, origins=(Literal,))
+classifier.register(FieldKind.BOOLEAN, form_field_builder(BooleanField), types=(bool,))
@@ -0,0 +1,117 @@
+from typing import Any, Callable, Optional
+import threading
+
+# Events emitted by the package:
+#   definition.cache_hit / definition.cache_miss   model
+#   definition.build                               model, fields, duration
+#   definition.field                               field, kind, duration
+#   file.<action>                                  file, duration, error (save, load, delete, ...)
+#   file.read / file.write                         file, bytes
+
+
+class Event:
+    __slots__ = ('name', 'duration', 'attributes')
+
+    def __init__(self, name: str, duration: Optional[float], attributes: dict[str, Any]):
+        self.name = name
+        self.duration = duration
+        self.attributes = attributes
+
+    def __repr__(self) -> str:
+        return f'Event(name={self.name!r}, duration={self.duration!r}, attributes={self.attributes!r})'
+
+
+Hook = Callable[[Event], None]
+
+# installed hooks, instrumented code checks this list before measuring anything,
+# so instrumentation costs nearly nothing as long as no hook is installed
+hooks: list[Hook] = []
+
+
+def add_hook(hook: Hook) -> Hook:
+    hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook: Hook):
+    if hook in hooks:
+        hooks.remove(hook)
+
+
+def emit(name: str, duration: Optional[float] = None, **attributes):
+    if not hooks:
+        return
+    event = Event(name, duration, attributes)
+    for hook in tuple(hooks):
+        hook(event)
+
+
+class MetricSummary:
+    __slots__ = ('count', 'duration', 'bytes', 'errors')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.bytes = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {'count': self.count, 'duration': self.duration, 'bytes': self.bytes, 'errors': self.errors}
+
+
+class InMemoryCollector:
+    """Hook that keeps the emitted events and aggregates them by event name.
+
+    Use it as context manager to install it for a block:
+
+        with InMemoryCollector() as collector:
+            MyForm.get_form_fields()
+        collector.export()
+    """
+    def __init__(self, keep_events: bool = True):
+        self.keep_events = keep_events
+        self.events: list[Event] = []
+        self.metrics: dict[str, MetricSummary] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event):
+        with self._lock:
+            if self.keep_events:
+                self.events.append(event)
+            summary = self.metrics.get(event.name)
+            if summary is None:
+                summary = self.metrics[event.name] = MetricSummary()
+            summary.count += 1
+            summary.duration += event.duration or 0.0
+            summary.bytes += event.attributes.get('bytes', 0)
+            if event.attributes.get('error') is not None:
+                summary.errors += 1
+
+    def __enter__(self) -> 'InMemoryCollector':
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_hook(self)
+
+    def count(self, name: str, **attributes) -> int:
+        if not attributes:
+            summary = self.metrics.get(name)
+            return summary.count if summary else 0
+        return sum(1 for event in self.filter(name, **attributes))
+
+    def filter(self, name: str, **attributes) -> list[Event]:
+        return [
+            event for event in self.events
+            if event.name == name and all(event.attributes.get(key) == value for key, value in attributes.items())
+        ]
+
+    def export(self) -> dict[str, dict[str, int | float]]:
+        """Aggregated metrics by event name, e.g. to forward them to a metrics system."""
+        with self._lock:
+            return {name: summary.as_dict() for name, summary in self.metrics.items()}
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.metrics.clear()
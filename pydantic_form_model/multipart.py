@@ -0,0 +1,92 @@
+# FastAPI integration, imported lazily by FormModel.as_multipart_form
+# so that FastAPI is only loaded when multipart forms are used.
+from typing import Annotated, Optional
+import inspect
+import logging
+from fastapi import Form, UploadFile, Depends, HTTPException
+from .classifier import FieldKind, classify
+from .exceptions import InvalidDefinitionException, FileTooLargeException
+from .spooling import SizeBudget, SpooledFile, spool_stream
+from .form_model import unpack_with_custom_annotation, get_object_type, get_list_item_type, get_max_file_size
+
+logger = logging.getLogger(__name__)
+
+
+def spool_uploads(kwargs: dict, file_fields: dict[str, Optional[int]], max_form_size: Optional[int]):
+    """Replace the uploads of file fields by `SpooledFile`s, oversized uploads are rejected with 413."""
+    budget = SizeBudget(max_form_size)
+    spooled: list[SpooledFile] = []
+    def spool(upload: UploadFile, max_size: Optional[int]) -> SpooledFile:
+        content = spool_stream(upload, upload.filename, max_size, budget=budget)
+        spooled.append(content)
+        return content
+    try:
+        for field_name, max_size in file_fields.items():
+            value = kwargs.get(field_name)
+            if isinstance(value, list):
+                kwargs[field_name] = [spool(upload, max_size) for upload in value]
+            elif value is not None:
+                kwargs[field_name] = spool(value, max_size)
+    except FileTooLargeException as e:
+        for content in spooled:
+            content.discard()
+        raise HTTPException(status_code=413, detail=e.message) from e
+
+
+def build_multipart_form(cls):
+    # file field name -> max_file_size, their uploads are spooled with size limits
+    file_fields: dict[str, Optional[int]] = {}
+    def __init__(self, **kwargs):
+        # constructor for dynamically created classes.
+        if file_fields:
+            spool_uploads(kwargs, file_fields, cls.__max_form_size__)
+        for k,v in kwargs.items():
+            setattr(self, k, v)
+    parameters = []
+    annotations = {}
+    for field_name, field_info in cls.model_fields.items():
+        annotation = unpack_with_custom_annotation(field_info.annotation)
+        field_annotation = Annotated[annotation, Form(...)]
+        kind = classify(annotation)
+        if kind == FieldKind.OBJECT:
+            sub_form = get_object_type(annotation).as_multipart_form()
+            field_annotation = Annotated[sub_form, Depends()]
+            # parameter_default = Depends(...)
+        elif kind == FieldKind.LIST:
+            list_item_type = get_list_item_type(annotation)
+            list_item_kind = classify(list_item_type)
+            if list_item_kind in (FieldKind.OBJECT, FieldKind.LIST):
+                raise InvalidDefinitionException(f'Field "{field_name}" in {cls.__name__}: Nested lists and lists of complex objects are not supported.')
+            if list_item_kind == FieldKind.FILE:
+                field_annotation = list[UploadFile]
+                file_fields[field_name] = get_max_file_size(field_info)
+            else:
+                field_annotation = Annotated[list[list_item_type], list[Form(...)]]
+
+        elif kind == FieldKind.FILE:
+            # uploads are streamed into SpooledFiles instead of being read into memory as bytes
+            field_annotation = UploadFile
+            file_fields[field_name] = get_max_file_size(field_info)
+        elif kind in (FieldKind.TEXT, FieldKind.NUMBER, FieldKind.BOOLEAN, FieldKind.SELECT):
+            pass
+        else:
+            raise InvalidDefinitionException(f'Invalid field definition {field_name}: {annotation}')
+        annotations[field_name] = field_annotation
+        # inspect.Parameter(inspect.Parameter.)
+        parameters.append(
+            inspect.Parameter(
+                name=field_name,
+                kind=inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=inspect.Parameter.empty,
+                annotation=field_annotation
+            )
+        )
+    class_name = f'Multipart{cls.__name__}'
+    create_parameters = {
+        '__init__': __init__,
+        '__annotations__': annotations,
+        '__signature__': inspect.Signature(parameters)
+    }
+    logger.debug('Create %s with signature %s', class_name, create_parameters['__signature__'])
+    return type(class_name,(object,),create_parameters )
+
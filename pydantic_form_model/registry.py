@@ -0,0 +1,153 @@
+from typing import TYPE_CHECKING, Iterator, Optional
+import logging
+import threading
+import time
+import weakref
+from .exceptions import FormModelException
+from .instrumentation import hooks, emit
+
+if TYPE_CHECKING:
+    from .form_model import FormDefinition, FormField, FormModel
+
+logger = logging.getLogger(__name__)
+
+# number of threads that build definitions in FormRegistry.warm
+DEFAULT_WARM_WORKERS = 4
+
+
+def model_name(model: type) -> str:
+    return f'{model.__module__}.{model.__qualname__}'
+
+
+class FormRegistry:
+    """FormModel classes by name.
+
+    Every FormModel subclass registers itself when it is defined, as `module.QualName` or with
+    the `form_name` class argument; `register=False` opts a class out:
+
+        class SignupForm(FormModel, form_name='signup'): ...
+        class BaseForm(FormModel, register=False): ...
+
+    Opted out classes are still part of the dependency graph, so rebuilding a sub-form refreshes
+    every form that embeds it. The graph holds the classes weakly (like `__subclasses__`), the
+    registered classes are kept until they are replaced by another class of the same name.
+    """
+    def __init__(self):
+        self.models: dict[str, type['FormModel']] = {}
+        self._classes: weakref.WeakSet[type['FormModel']] = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def track(self, model: type['FormModel']):
+        """Add a class to the dependency graph without registering it by name."""
+        with self._lock:
+            self._classes.add(model)
+
+    def register(self, model: type['FormModel'], name: Optional[str] = None) -> str:
+        name = name or model_name(model)
+        with self._lock:
+            previous = self.models.get(name)
+            if previous is not None and previous is not model:
+                logger.debug('%s replaces %s in the form registry', model_name(model), model_name(previous))
+            self.models[name] = model
+            self._classes.add(model)
+        return name
+
+    def unregister(self, name: str):
+        with self._lock:
+            self.models.pop(name, None)
+
+    def get(self, name: str) -> Optional[type['FormModel']]:
+        return self.models.get(name)
+
+    def __getitem__(self, name: str) -> type['FormModel']:
+        model = self.models.get(name)
+        if model is None:
+            raise FormModelException(f'No form registered as {name}')
+        return model
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.models
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.models.keys()))
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+    def get_form_definition(self, name: str, refs: bool = False) -> 'FormDefinition':
+        return self[name].get_form_definition(refs)
+
+    def get_form_fields(self, name: str) -> list['FormField']:
+        return self[name].get_form_fields()
+
+    def dependency_graph(self) -> dict[type['FormModel'], set[type['FormModel']]]:
+        """`model -> sub-forms it embeds` of all FormModel classes."""
+        with self._lock:
+            classes = list(self._classes)
+        return {model: model.form_dependencies() for model in classes}
+
+    def dependents(self, model: type['FormModel']) -> set[type['FormModel']]:
+        """Classes that embed `model`, directly or through other sub-forms."""
+        embedded_by: dict[type, list[type]] = {}
+        for dependent, dependencies in self.dependency_graph().items():
+            for dependency in dependencies:
+                embedded_by.setdefault(dependency, []).append(dependent)
+        found = set()
+        pending = [model]
+        while pending:
+            for dependent in embedded_by.get(pending.pop(), ()):
+                if dependent not in found:
+                    found.add(dependent)
+                    pending.append(dependent)
+        found.discard(model)
+        return found
+
+    def build_order(self, models: list[type['FormModel']]) -> list[list[type['FormModel']]]:
+        """Groups of `models` whose sub-forms are in earlier groups. Recursive models form the last group."""
+        remaining = {model: model.form_dependencies() & set(models) - {model} for model in models}
+        levels = []
+        while remaining:
+            level = [model for model, dependencies in remaining.items() if not dependencies]
+            if not level:
+                levels.append(list(remaining))
+                break
+            levels.append(level)
+            for model in level:
+                del remaining[model]
+            for dependencies in remaining.values():
+                dependencies.difference_update(level)
+        return levels
+
+    def warm(self, names: Optional[list[str]] = None, refs: bool = False, max_workers: int = DEFAULT_WARM_WORKERS) -> dict[str, FormModelException]:
+        """Build the definitions of the registered forms (default: all) ahead of time.
+
+        Sub-forms are built before the forms that embed them, every group with up to `max_workers`
+        threads. Returns the forms whose definition can't be built, e.g. the inline definition of
+        recursive models.
+        """
+        start = time.perf_counter()
+        models = {name: self[name] for name in (list(self) if names is None else names)}
+        names_of = {model: name for name, model in models.items()}
+        failures = {}
+
+        def build(model: type['FormModel']):
+            try:
+                model.get_form_definition(refs)
+            except FormModelException as e:
+                failures[names_of[model]] = e
+
+        for level in self.build_order(list(names_of)):
+            if max_workers <= 1 or len(level) <= 1:
+                for model in level:
+                    build(model)
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(level))) as executor:
+                    list(executor.map(build, level))
+        if hooks:
+            emit('registry.warm', time.perf_counter() - start, models=len(models), failures=len(failures))
+        return failures
+
+
+# registry of all FormModel subclasses
+form_registry = FormRegistry()
@@ -0,0 +1,178 @@
+from typing import Any, Callable, Iterable, Optional
+from enum import Enum
+import re
+from humps import camelize
+from .form_fields import RenderCondition
+from .validation import has_value, format_path
+
+PathPart = str | int
+
+_PATH_PART = re.compile(r'([^.\[\]]+)|\[(\d+)\]')
+_MISSING = object()
+
+
+def parse_path(path: str) -> tuple[PathPart, ...]:
+    """Parse a property path like `address.zip_code` or `items[3].file` into its parts."""
+    return tuple(int(index) if index else name for name, index in _PATH_PART.findall(path))
+
+
+def compile_accessor(parts: tuple[PathPart, ...]) -> Callable[[Any], Any]:
+    """Compile path parts into an accessor for model instances and raw (dict) payloads.
+
+    Keys of raw payloads may be field names or their camelCase aliases.
+    """
+    aliases = {part: camelize(part) for part in parts if isinstance(part, str)}
+    def get(values: Any) -> Any:
+        value = values
+        for part in parts:
+            try:
+                if isinstance(part, int):
+                    value = value[part]
+                elif isinstance(value, dict):
+                    value = value[part] if part in value else value[aliases[part]]
+                else:
+                    value = getattr(value, part)
+            except (KeyError, IndexError, AttributeError, TypeError):
+                return _MISSING
+            if value is None:
+                return None
+        return value
+    return get
+
+
+class CompiledCondition:
+    def __init__(self, parts: tuple[PathPart, ...], expected: Any, nested: list['CompiledCondition']):
+        self.parts = parts
+        self.get = compile_accessor(parts)
+        self.expected = expected.value if isinstance(expected, Enum) else expected
+        self.nested = nested
+
+    def holds(self, values: Any) -> bool:
+        value = self.get(values)
+        if value is _MISSING:
+            value = None
+        if isinstance(value, Enum):
+            value = value.value
+        if self.expected is None:
+            matches = has_value(value)
+        else:
+            matches = value == self.expected
+        return matches and all(condition.holds(values) for condition in self.nested)
+
+    def paths(self) -> Iterable[tuple[PathPart, ...]]:
+        yield self.parts
+        for condition in self.nested:
+            yield from condition.paths()
+
+
+def compile_condition(condition: RenderCondition | dict, prefix: tuple[PathPart, ...] = ()) -> CompiledCondition:
+    if not isinstance(condition, RenderCondition):
+        condition = RenderCondition.model_validate(condition)
+    nested = [compile_condition(nested_condition, prefix) for nested_condition in condition.render_conditions]
+    return CompiledCondition(prefix + parse_path(condition.property_path), condition.has_value, nested)
+
+
+class _DependencyNode:
+    __slots__ = ('fields', 'children')
+
+    def __init__(self):
+        self.fields: set[str] = set()
+        self.children: dict[PathPart, '_DependencyNode'] = {}
+
+
+class RenderEvaluator:
+    """Evaluates the render conditions of a form.
+
+    A field is rendered if all of its render conditions hold. A condition holds if the value at its
+    `property_path` equals `has_value` (or has any value if `has_value` is not set) and all of its nested
+    conditions hold. Property paths are relative to the form model that declares the field.
+
+    The evaluator keeps a dependency graph from property paths to the fields they control, so `update`
+    only re-evaluates the conditions that depend on a changed value.
+    """
+    def __init__(self, conditions: dict[str, list[CompiledCondition]]):
+        self.conditions = conditions
+        self.dependencies = _DependencyNode()
+        for field_path, field_conditions in conditions.items():
+            for condition in field_conditions:
+                for parts in condition.paths():
+                    node = self.dependencies
+                    for part in parts:
+                        node = node.children.setdefault(part, _DependencyNode())
+                    node.fields.add(field_path)
+
+    def is_rendered(self, field_path: str, values: Any) -> bool:
+        return all(condition.holds(values) for condition in self.conditions.get(field_path, ()))
+
+    def evaluate(self, values: Any) -> dict[str, bool]:
+        """Evaluate all conditions, returns whether each conditional field is rendered by field path."""
+        return {field_path: self.is_rendered(field_path, values) for field_path in self.conditions}
+
+    def dependents(self, changed_path: str | tuple[PathPart, ...]) -> set[str]:
+        """Fields whose conditions depend on the value at `changed_path` (or on values inside or around it)."""
+        parts = parse_path(changed_path) if isinstance(changed_path, str) else changed_path
+        fields: set[str] = set()
+        node = self.dependencies
+        for part in parts:
+            # conditions on a parent of the changed value
+            fields |= node.fields
+            node = node.children.get(part)
+            if node is None:
+                return fields
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            fields |= node.fields
+            stack.extend(node.children.values())
+        return fields
+
+    def update(self, state: dict[str, bool], values: Any, changed_paths: Iterable[str]) -> dict[str, bool]:
+        """Re-evaluate only the conditions that depend on the changed values and update `state` in place."""
+        affected: set[str] = set()
+        for changed_path in changed_paths:
+            affected |= self.dependents(changed_path)
+        for field_path in affected:
+            state[field_path] = self.is_rendered(field_path, values)
+        return state
+
+    def hidden_fields(self, values: Any) -> set[str]:
+        return {field_path for field_path in self.conditions if not self.is_rendered(field_path, values)}
+
+    def strip_hidden(self, data: dict) -> dict:
+        """Return a copy of the raw payload `data` without the values of hidden fields."""
+        hidden = sorted((parse_path(field_path) for field_path in self.hidden_fields(data)), key=len)
+        if not hidden:
+            return data
+        stripped = _copy_containers(data)
+        for parts in hidden:
+            parent = compile_accessor(parts[:-1])(stripped)
+            if isinstance(parent, dict):
+                parent.pop(parts[-1], None)
+                parent.pop(camelize(parts[-1]), None)
+        return stripped
+
+
+def _copy_containers(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _copy_containers(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_containers(item) for item in value]
+    return value
+
+
+def build_conditions(model_cls: type, prefix: tuple[PathPart, ...] = (), seen: Optional[set] = None) -> dict[str, list[CompiledCondition]]:
+    """Collect and compile the render conditions of a FormModel class and its (non-list) sub-forms."""
+    seen = set() if seen is None else seen
+    if model_cls in seen:
+        return {}
+    seen = seen | {model_cls}
+    conditions: dict[str, list[CompiledCondition]] = {}
+    for field_name, field_info in model_cls.model_fields.items():
+        field_schema = field_info.json_schema_extra if isinstance(field_info.json_schema_extra, dict) else {}
+        field_conditions = field_schema.get('render_conditions', None) or []
+        if field_conditions:
+            conditions[format_path(prefix + (field_name,))] = [compile_condition(condition, prefix) for condition in field_conditions]
+    for field_name, (sub_form, is_list_field) in model_cls.get_sub_forms().items():
+        if not is_list_field:
+            conditions |= build_conditions(sub_form, prefix + (field_name,), seen)
+    return conditions
@@ -0,0 +1,32 @@
+"""Serialization of FormField trees.
+
+The whole tree is serialized by one compiled pydantic-core serializer for `list[FormField]`
+(with `serialize_as_any`, so nested fields keep the attributes of their subclass). Aliases are
+resolved when the FormField classes are built, so `camelize` is never called while dumping.
+Without exclude options the output equals `model_dump(by_alias=True)` of every field
+(`dump_form_fields`) and its compact JSON (`dump_form_fields_json`).
+
+`exclude_none` leaves out the attributes without value, which are most of a definition;
+`exclude_defaults` also leaves out empty lists, `rendered: true` and other default values.
+"""
+from typing import Any, Iterable
+from pydantic import TypeAdapter
+from .form_fields import FormField
+
+form_fields_adapter = TypeAdapter(list[FormField])
+
+
+def dump_form_fields(form_fields: Iterable[FormField], exclude_none: bool = False, exclude_unset: bool = False, exclude_defaults: bool = False) -> list[dict[str, Any]]:
+    return form_fields_adapter.dump_python(
+        form_fields if isinstance(form_fields, list) else list(form_fields),
+        by_alias=True, serialize_as_any=True,
+        exclude_none=exclude_none, exclude_unset=exclude_unset, exclude_defaults=exclude_defaults
+    )
+
+
+def dump_form_fields_json(form_fields: Iterable[FormField], exclude_none: bool = False, exclude_unset: bool = False, exclude_defaults: bool = False) -> bytes:
+    return form_fields_adapter.dump_json(
+        form_fields if isinstance(form_fields, list) else list(form_fields),
+        by_alias=True, serialize_as_any=True,
+        exclude_none=exclude_none, exclude_unset=exclude_unset, exclude_defaults=exclude_defaults
+    )
@@ -0,0 +1,231 @@
+"""Build-time snapshots of form definitions.
+
+A snapshot contains the definition JSON of every FormModel class together with a fingerprint
+of the class. `load_snapshot` installs the definitions of all classes whose fingerprint still
+matches, so a new worker serves definitions without building them; classes that changed since
+the snapshot was created are built live as usual. The fields of a restored definition are only
+built when they are accessed (`get_form_fields`).
+
+    python -m pydantic_form_model.snapshots create forms.snapshot.json myapp.forms
+    python -m pydantic_form_model.snapshots verify forms.snapshot.json myapp.forms
+"""
+from typing import Any, Iterable, Iterator, Optional
+from enum import Enum
+from os import PathLike
+from pathlib import Path
+import hashlib
+import json
+import logging
+import re
+import sys
+from . import form_model
+from .form_fields import BaseSchema
+from .form_model import FormDefinition, FormModel, all_form_models, iter_annotation_classes
+from .registry import model_name
+from .exceptions import InvalidDefinitionException
+from .instrumentation import hooks, emit
+from .choice_index import defer_index_for_enum
+
+logger = logging.getLogger(__name__)
+
+# format of the snapshot file, snapshots of other formats are not loaded
+SNAPSHOT_FORMAT = 3
+
+# memory addresses in reprs (e.g. of default factories) differ between processes
+_ADDRESS = re.compile(r' at 0x[0-9a-fA-F]+')
+
+
+class SnapshotReport(BaseSchema):
+    loaded: list[str] = []
+    stale: list[str] = []
+    missing: list[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.stale and not self.missing
+
+
+def package_version() -> Optional[str]:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version('pydantic-form-model')
+    except PackageNotFoundError:
+        return None
+
+
+_annotations: dict[Any, tuple[str, tuple[type, ...]]] = {}
+
+
+def _describe_annotation(annotation: Any) -> tuple[str, tuple[type, ...]]:
+    """Repr of an annotation and the FormModel and Enum classes in it, cached per annotation."""
+    try:
+        return _annotations[annotation]
+    except (KeyError, TypeError):
+        pass
+    classes = tuple(cls for cls in iter_annotation_classes(annotation) if issubclass(cls, (FormModel, Enum)))
+    description = (repr(annotation), classes)
+    try:
+        _annotations[annotation] = description
+    except TypeError:
+        pass
+    return description
+
+
+def fingerprint(model: type[FormModel], _memo: Optional[dict] = None) -> str:
+    """Hash of the fields of a FormModel class, its sub-forms and the members of the enums it uses."""
+    memo = {} if _memo is None else _memo
+    if model in memo:
+        # recursive models refer to themselves by name
+        return memo[model] or f'recursive:{model_name(model)}'
+    memo[model] = None
+    parts = [model_name(model), repr(model.model_config)]
+    for field_name, field_info in model.model_fields.items():
+        annotation, classes = _describe_annotation(field_info.annotation)
+        # the explicitly set attributes, a lot faster than the repr of the FieldInfo
+        parts.append(f'{field_name}\0{annotation}\0{field_info._attributes_set!r}\0{field_info.metadata!r}')
+        for cls in classes:
+            if issubclass(cls, FormModel):
+                parts.append(fingerprint(cls, memo))
+            else:
+                parts.append(repr([(member.name, member.value) for member in cls]))
+    memo[model] = hashlib.sha256(_ADDRESS.sub('', '\0'.join(parts)).encode()).hexdigest()
+    return memo[model]
+
+
+def _iter_enums(model: type[FormModel], seen: set) -> Iterator[type[Enum]]:
+    """The enums used by the fields of a FormModel class and its sub-forms."""
+    seen.add(model)
+    for field_info in model.model_fields.values():
+        for cls in _describe_annotation(field_info.annotation)[1]:
+            if not issubclass(cls, FormModel):
+                yield cls
+            elif cls not in seen:
+                yield from _iter_enums(cls, seen)
+
+
+def _definition_json(model: type[FormModel], refs: bool) -> Optional[bytes]:
+    try:
+        return model.get_form_definition(refs).json
+    except InvalidDefinitionException as e:
+        logger.debug('No %s definition of %s in the snapshot: %s', 'reference' if refs else 'inline', model_name(model), e.message)
+        return None
+
+
+def create_snapshot(models: Optional[Iterable[type[FormModel]]] = None) -> bytes:
+    """Snapshot of the definitions of `models` (default: all defined FormModel subclasses).
+
+    The snapshot is a JSON header line with the fingerprint and the position of the definitions
+    of every model, followed by the definition JSONs, which are sliced out on load without parsing them.
+    """
+    memo = {}
+    entries = {}
+    body = []
+    offset = 0
+    for model in (all_form_models() if models is None else models):
+        entry = entries[model_name(model)] = {'fingerprint': fingerprint(model, memo)}
+        for key, refs in (('definition', False), ('ref_definition', True)):
+            definition = _definition_json(model, refs)
+            if definition is None:
+                entry[key] = None
+                continue
+            entry[key] = [offset, len(definition)]
+            body.append(definition)
+            offset += len(definition)
+    header = {'format': SNAPSHOT_FORMAT, 'package_version': package_version(), 'models': entries}
+    return b''.join([json.dumps(header, separators=(',', ':')).encode(), b'\n', *body])
+
+
+def write_snapshot(path: str | PathLike, models: Optional[Iterable[type[FormModel]]] = None) -> int:
+    """Write a snapshot file, returns the number of models in it."""
+    snapshot = create_snapshot(models)
+    Path(path).write_bytes(snapshot)
+    return len(json.loads(snapshot[:snapshot.index(b'\n')])['models'])
+
+
+def read_snapshot(path: str | PathLike) -> tuple[dict[str, Any], memoryview]:
+    """Header and definitions of a snapshot file."""
+    content = Path(path).read_bytes()
+    separator = content.index(b'\n')
+    header = json.loads(content[:separator])
+    if header.get('format') != SNAPSHOT_FORMAT or header.get('package_version') != package_version():
+        logger.warning('Snapshot %s was created by another version, all definitions are built live', path)
+        header['models'] = {}
+    return header, memoryview(content)[separator + 1:]
+
+
+def _check(header: dict[str, Any], models: Optional[Iterable[type[FormModel]]]) -> Iterator[tuple[type[FormModel], Optional[dict], str]]:
+    memo = {}
+    entries = header['models']
+    for model in (all_form_models() if models is None else models):
+        name = model_name(model)
+        entry = entries.get(name)
+        if entry is None:
+            yield model, None, 'missing'
+        elif entry['fingerprint'] != fingerprint(model, memo):
+            yield model, entry, 'stale'
+        else:
+            yield model, entry, 'loaded'
+
+
+def verify_snapshot(path: str | PathLike, models: Optional[Iterable[type[FormModel]]] = None) -> SnapshotReport:
+    """Compare a snapshot with the current classes without installing it."""
+    report = SnapshotReport()
+    header, _ = read_snapshot(path)
+    for model, _, state in _check(header, models):
+        getattr(report, state).append(model_name(model))
+    return report
+
+
+def load_snapshot(path: str | PathLike, models: Optional[Iterable[type[FormModel]]] = None) -> SnapshotReport:
+    """Install the snapshot definitions of all classes that did not change since the snapshot was created."""
+    report = SnapshotReport()
+    header, body = read_snapshot(path)
+    generation = form_model._definition_generation
+    seen_models: set = set()
+    for model, entry, state in _check(header, models):
+        getattr(report, state).append(model_name(model))
+        if hooks:
+            emit('definition.snapshot', model=model.__name__, state=state)
+        if state != 'loaded':
+            if state == 'stale':
+                logger.info('%s changed since the snapshot was created, its definition is built live', model_name(model))
+            continue
+        if entry['definition'] is not None:
+            offset, length = entry['definition']
+            model.__form_definition__ = FormDefinition.restore(bytes(body[offset:offset + length]), generation, lambda model=model: model.build_form_definition())
+        if entry['ref_definition'] is not None:
+            offset, length = entry['ref_definition']
+            model.__ref_form_definition__ = FormDefinition.restore(bytes(body[offset:offset + length]), generation, lambda model=model: model.build_form_definition(refs=True), form_model.get_ref_name(model))
+        # the fields are not built, so the choice indexes the definitions refer to are built on request
+        for enum in _iter_enums(model, seen_models):
+            defer_index_for_enum(enum)
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+    import importlib
+    parser = argparse.ArgumentParser(prog='python -m pydantic_form_model.snapshots', description='Create and verify form definition snapshots.')
+    parser.add_argument('command', choices=['create', 'verify'])
+    parser.add_argument('snapshot', type=Path, help='snapshot file')
+    parser.add_argument('modules', nargs='+', help='modules that define the form models')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, '')
+    for module in args.modules:
+        importlib.import_module(module)
+    if args.command == 'create':
+        count = write_snapshot(args.snapshot)
+        print(f'{count} form definitions written to {args.snapshot}')
+        return 0
+    report = verify_snapshot(args.snapshot)
+    print(f'{len(report.loaded)} up to date, {len(report.stale)} stale, {len(report.missing)} missing')
+    for name in report.stale:
+        print(f'stale: {name}')
+    for name in report.missing:
+        print(f'missing: {name}')
+    return 0 if report.ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
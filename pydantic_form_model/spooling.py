@@ -0,0 +1,171 @@
+from typing import Any, BinaryIO, Optional
+from os import PathLike
+from pathlib import Path
+from io import BytesIO
+import logging
+import tempfile
+import threading
+import weakref
+from .base64_stream import DEFAULT_CHUNK_SIZE, b64decode_to_stream, b64decoded_size
+from .exceptions import FileTooLargeException
+
+logger = logging.getLogger(__name__)
+
+# content up to this size is kept in memory, larger content is spilled to a temporary file
+DEFAULT_SPOOL_THRESHOLD = 1024 * 1024
+
+
+class SizeBudget:
+    """Limit of the total size of the files of one form, shared by all its files."""
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def consume(self, size: int, name: Optional[str] = None):
+        if self.limit is None:
+            return
+        with self._lock:
+            if self.used + size > self.limit:
+                raise FileTooLargeException(f'The files of the form are larger than the maximum form size of {self.limit} bytes (at {name})', self.limit)
+            self.used += size
+
+
+def _remove_temporary_file(path: Path):
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning('spooled file %s could not be removed: %s', path, e)
+
+
+class SpooledFile:
+    """Ingested file content, kept in memory up to `threshold` bytes and spilled to a temporary file above.
+
+    Writes beyond `max_size` (or the form's `budget`) raise a `FileTooLargeException` as soon as the
+    limit is exceeded. The temporary file is created in `directory`; on the file system of the storage
+    it is moved into place by `save_files` instead of being copied. A temporary file that was not
+    handed over by `detach` is removed when the SpooledFile is discarded or garbage collected.
+    """
+    def __init__(self, name: Optional[str] = None, max_size: Optional[int] = None, threshold: int = DEFAULT_SPOOL_THRESHOLD, directory: Optional[str | PathLike] = None, budget: Optional[SizeBudget] = None):
+        self.name = name
+        self.max_size = max_size
+        self.threshold = threshold
+        self.directory = directory
+        self.budget = budget
+        self.size = 0
+        self.path: Optional[Path] = None
+        self._buffer: Optional[BytesIO] = BytesIO()
+        self._file: Optional[BinaryIO] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        if self.max_size is not None and self.size + size > self.max_size:
+            raise FileTooLargeException(f'{self.name} is larger than the maximum file size of {self.max_size} bytes', self.max_size)
+        if self.budget is not None:
+            self.budget.consume(size, self.name)
+        if self._buffer is not None and self.size + size > self.threshold:
+            self._rollover()
+        (self._buffer if self._buffer is not None else self._file).write(data)
+        self.size += size
+        return size
+
+    def _rollover(self):
+        self._file = tempfile.NamedTemporaryFile(dir=self.directory, prefix='spool-', delete=False)
+        self.path = Path(self._file.name)
+        self._finalizer = weakref.finalize(self, _remove_temporary_file, self.path)
+        self._file.write(self._buffer.getbuffer())
+        self._buffer = None
+        logger.debug('%s is spooled to %s', self.name, self.path)
+
+    @property
+    def in_memory(self) -> bool:
+        return self._buffer is not None
+
+    def getvalue(self) -> bytes:
+        if self._buffer is not None:
+            return self._buffer.getvalue()
+        with self.open() as f:
+            return f.read()
+
+    def open(self) -> BinaryIO:
+        """New reader of the content."""
+        if self._buffer is not None:
+            return BytesIO(self._buffer.getvalue())
+        if self._file is not None:
+            self._file.flush()
+        return open(self.path, 'rb')
+
+    def read(self) -> bytes:
+        return self.getvalue()
+
+    def close(self):
+        """Finish writing, the content can still be read."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def detach(self) -> Path:
+        """Hand the temporary file over to the caller, e.g. to move it into place."""
+        self.close()
+        if self._finalizer is not None:
+            self._finalizer.detach()
+            self._finalizer = None
+        path = self.path
+        self.path = None
+        self._buffer = BytesIO()
+        self.size = 0
+        return path
+
+    def discard(self):
+        """Remove the content, including the temporary file."""
+        self.close()
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self.path = None
+        self._buffer = BytesIO()
+        self.size = 0
+
+    def __enter__(self) -> 'SpooledFile':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+    def __repr__(self) -> str:
+        return f'SpooledFile(name={self.name!r}, size={self.size}, path={self.path!r})'
+
+
+def spool_stream(content: Any, name: Optional[str] = None, max_size: Optional[int] = None, threshold: int = DEFAULT_SPOOL_THRESHOLD, directory: Optional[str | PathLike] = None, budget: Optional[SizeBudget] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SpooledFile:
+    """Read uploaded content (bytes, a binary stream or an object with a `file` stream such as `UploadFile`) into a `SpooledFile`.
+
+    The content is read in blocks of `chunk_size` bytes, so oversized content is rejected after
+    reading at most one block beyond the limit.
+    """
+    # the size of an upload is known when it was parsed, e.g. `UploadFile.size`
+    size = getattr(content, 'size', None)
+    if max_size is not None and isinstance(size, int) and size > max_size:
+        raise FileTooLargeException(f'{name} is larger than the maximum file size of {max_size} bytes', max_size)
+    stream = getattr(content, 'file', content)
+    spooled = SpooledFile(name, max_size, threshold, directory, budget)
+    with spooled:
+        if isinstance(stream, (bytes, bytearray, memoryview)):
+            spooled.write(stream)
+        else:
+            while block := stream.read(chunk_size):
+                spooled.write(block)
+    return spooled
+
+
+def spool_base64(data: str, name: Optional[str] = None, max_size: Optional[int] = None, threshold: int = DEFAULT_SPOOL_THRESHOLD, directory: Optional[str | PathLike] = None, budget: Optional[SizeBudget] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SpooledFile:
+    """Decode base64 `data` into a `SpooledFile`, oversized data is rejected before it is decoded."""
+    if max_size is not None and b64decoded_size(data) > max_size:
+        raise FileTooLargeException(f'{name} is larger than the maximum file size of {max_size} bytes', max_size)
+    spooled = SpooledFile(name, max_size, threshold, directory, budget)
+    with spooled:
+        b64decode_to_stream(data, spooled, chunk_size)
+    return spooled
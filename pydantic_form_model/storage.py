@@ -0,0 +1,622 @@
+from typing import Any, BinaryIO, Callable, Optional
+from os import PathLike
+from pathlib import Path
+from io import BytesIO
+from contextlib import contextmanager
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# writes the content of a file to the given stream
+ContentWriter = Callable[[BinaryIO], Any]
+
+
+class FileStorage:
+    """Storage backend of form files.
+
+    `save` returns the key of the stored content, which is kept in the `path` of the file
+    and passed to `open` and `delete` later on.
+    """
+    def save(self, name: str, write: ContentWriter) -> str:
+        raise NotImplementedError
+
+    def save_path(self, name: str, source: str | PathLike) -> str:
+        """Store the content of the local file `source`."""
+        with open(source, 'rb') as f:
+            return self.save(name, lambda stream: shutil.copyfileobj(f, stream))
+
+    def move_path(self, name: str, source: str | PathLike) -> str:
+        """Store the local file `source` and remove it, e.g. an assembled upload."""
+        key = self.save_path(name, source)
+        Path(source).unlink(missing_ok=True)
+        return key
+
+    def open(self, key: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def delete(self, key: str, missing_ok: bool = False):
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Path of the stored content on the local file system, if there is one."""
+        return None
+
+    def transaction(self, sync: bool = True) -> 'StorageTransaction':
+        """Transaction whose saves and deletes take effect together on `commit`, see `StorageTransaction`.
+
+        With `sync`, backends that support it flush the committed files to disk.
+        """
+        return StorageTransaction(self)
+
+
+class StorageTransaction(FileStorage):
+    """Saves and deletes of one form, committed or rolled back together.
+
+    This generic transaction stores saved files right away and removes them again on rollback,
+    deletes and the removal of moved sources are deferred until `commit`. It relies on saves never
+    replacing stored content (like `ContentAddressedStorage`); backends whose saves overwrite files
+    by name stage them in their own transaction (see `DirectoryStorage` and `MemoryStorage`). Used
+    as context manager, the transaction is committed at the end of the block and rolled back on an
+    exception.
+    """
+    def __init__(self, storage: FileStorage):
+        self.storage = storage
+        self.saved: list[str] = []
+        self.deleted: list[tuple[str, bool]] = []
+        self._callbacks: list[Callable[[], Any]] = []
+        self._lock = threading.Lock()
+
+    def _saved(self, key: str) -> str:
+        with self._lock:
+            self.saved.append(key)
+        return key
+
+    def save(self, name: str, write: ContentWriter) -> str:
+        return self._saved(self.storage.save(name, write))
+
+    def save_path(self, name: str, source: str | PathLike) -> str:
+        return self._saved(self.storage.save_path(name, source))
+
+    def move_path(self, name: str, source: str | PathLike) -> str:
+        # the source is only removed on commit, so a rolled back transaction keeps it
+        key = self.save_path(name, source)
+        self.on_commit(lambda: Path(source).unlink(missing_ok=True))
+        return key
+
+    def open(self, key: str) -> BinaryIO:
+        return self.storage.open(key)
+
+    def delete(self, key: str, missing_ok: bool = False):
+        with self._lock:
+            self.deleted.append((key, missing_ok))
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self.storage.local_path(key)
+
+    def on_commit(self, callback: Callable[[], Any]):
+        """Run `callback` after the transaction was committed, e.g. to release the source of a moved file."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def commit(self):
+        for key, missing_ok in self.deleted:
+            self.storage.delete(key, missing_ok=missing_ok)
+        self._run_callbacks()
+
+    def _run_callbacks(self):
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning('Callback after commit failed: %s', e)
+
+    def rollback(self):
+        for key in reversed(self.saved):
+            try:
+                self.storage.delete(key, missing_ok=True)
+            except Exception as e:
+                logger.warning('Failed to remove %s on rollback: %s', key, e)
+        self.saved.clear()
+        self.deleted.clear()
+
+    def __enter__(self) -> 'StorageTransaction':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+def fsync_path(path: str | PathLike):
+    """Flush a file or directory to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# hidden temporary files, backups and tombstones of DirectoryTransaction
+_HIDDEN_FILE = re.compile(r'^\..+\.[0-9a-f]{12}\.(tmp|bak|del)$')
+JOURNAL_PREFIX = '.transaction-'
+
+
+class DirectoryTransaction(StorageTransaction):
+    """Atomic transaction of a `DirectoryStorage`.
+
+    Content is written to temporary files next to its target. On `commit` the temporary files are
+    flushed to disk in one batch, deleted files are renamed to tombstones and the temporary files
+    are renamed into place (replaced files are kept as backup until the end). The directories are
+    flushed once, then backups and tombstones are removed. If a rename fails, all renames are
+    undone; `rollback` removes the temporary files and moves moved sources back.
+
+    With `sync`, a journal of the renames is written and flushed before the first rename. A crash during the renames leaves a mix of old and new files, which
+    `DirectoryStorage.recover` completes from the journal, so after recovery every target has its
+    new content; a crash before the journal was written leaves all targets unchanged.
+    """
+    def __init__(self, storage: 'DirectoryStorage', sync: bool = True):
+        super().__init__(storage)
+        self.sync = sync
+        # temporary file -> target path
+        self.pending: dict[Path, Path] = {}
+        # temporary file -> source of a moved file
+        self.moved: dict[Path, Path] = {}
+
+    def _target(self, name: str) -> Path:
+        if self.storage.directory is None:
+            raise ValueError('DirectoryStorage needs a directory to save files')
+        return Path(f'{self.storage.directory}/{name}')
+
+    @staticmethod
+    def _hidden(path: Path, suffix: str) -> Path:
+        return path.with_name(f'.{path.name}.{uuid.uuid4().hex[:12]}.{suffix}')
+
+    def _add(self, temp: Path, target: Path, source: Optional[Path] = None) -> str:
+        with self._lock:
+            self.pending[temp] = target
+            if source is not None:
+                self.moved[temp] = source
+        return target.as_posix()
+
+    def save(self, name: str, write: ContentWriter) -> str:
+        target = self._target(name)
+        temp = self._hidden(target, 'tmp')
+        try:
+            with open(temp, 'wb') as f:
+                write(f)
+        except BaseException:
+            temp.unlink(missing_ok=True)
+            raise
+        return self._add(temp, target)
+
+    def save_path(self, name: str, source: str | PathLike) -> str:
+        target = self._target(name)
+        # the file is already stored at its place, e.g. lazily loaded data
+        if target.exists() and target.samefile(source):
+            return target.as_posix()
+        temp = self._hidden(target, 'tmp')
+        try:
+            shutil.copyfile(source, temp)
+        except BaseException:
+            temp.unlink(missing_ok=True)
+            raise
+        return self._add(temp, target)
+
+    def move_path(self, name: str, source: str | PathLike) -> str:
+        target = self._target(name)
+        temp = self._hidden(target, 'tmp')
+        shutil.move(source, temp)
+        return self._add(temp, target, Path(source))
+
+    def delete(self, key: str, missing_ok: bool = False):
+        path = Path(key)
+        if not path.exists():
+            if missing_ok:
+                return
+            raise FileNotFoundError(f'No file stored at {key}')
+        super().delete(key, missing_ok)
+
+    def _write_journal(self, replaces: list[tuple[Path, Path, Path]], deletes: list[tuple[Path, Path, bool]]) -> Optional[Path]:
+        """Write the renames of the commit to a journal and flush it.
+
+        The journal is kept in the storage directory, or next to the first file of the transaction
+        for a storage without directory (e.g. the deletes of `FormModel.delete_files`).
+        """
+        if self.storage.directory is not None:
+            directory = Path(self.storage.directory)
+        elif replaces or deletes:
+            directory = (replaces[0][1] if replaces else deletes[0][0]).parent
+        else:
+            return None
+        relative = lambda path: os.path.relpath(path, directory)
+        journal = directory / f'{JOURNAL_PREFIX}{uuid.uuid4().hex[:12]}.journal'
+        content = json.dumps({
+            'replace': [[relative(temp), relative(target), relative(backup)] for temp, target, backup in replaces],
+            'delete': [[relative(path), relative(tombstone)] for path, tombstone, _ in deletes],
+        })
+        # renamed into place, a journal is either complete or missing
+        temp = journal.with_name(f'{journal.name}.tmp')
+        with open(temp, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, journal)
+        fsync_path(directory)
+        return journal
+
+    def commit(self):
+        replaces = [(temp, target, self._hidden(target, 'bak')) for temp, target in self.pending.items()]
+        deletes = [(Path(key), self._hidden(Path(key), 'del'), missing_ok) for key, missing_ok in self.deleted]
+        # (renamed path, original path) of every rename, undone in reverse order on failure
+        renames: list[tuple[Path, Path]] = []
+        # (backup, target) of replaced files and tombstones of deleted files, removed after the commit
+        backups: list[tuple[Path, Path]] = []
+        tombstones: list[Path] = []
+        directories = set()
+        journal = None
+        try:
+            if self.sync:
+                for temp in self.pending:
+                    fsync_path(temp)
+                journal = self._write_journal(replaces, deletes)
+            for path, tombstone, missing_ok in deletes:
+                try:
+                    os.rename(path, tombstone)
+                except FileNotFoundError:
+                    if not missing_ok:
+                        raise
+                    continue
+                renames.append((tombstone, path))
+                tombstones.append(tombstone)
+                directories.add(path.parent)
+            for temp, target, backup in replaces:
+                if target.exists():
+                    # a hard link keeps the target in place until it is replaced atomically
+                    try:
+                        os.link(target, backup)
+                    except OSError:
+                        os.rename(target, backup)
+                    renames.append((backup, target))
+                    backups.append((backup, target))
+                os.replace(temp, target)
+                renames.append((target, temp))
+                directories.add(target.parent)
+        except BaseException:
+            for renamed, original in reversed(renames):
+                try:
+                    os.replace(renamed, original)
+                except OSError as e:
+                    logger.error('Failed to undo the rename of %s to %s: %s', original, renamed, e)
+            # renaming a hard link onto its other name does nothing, so the backup of a target
+            # that was not replaced yet is still there; backups are only kept if their target is lost
+            for backup, target in backups:
+                if target.exists():
+                    backup.unlink(missing_ok=True)
+            if journal is not None:
+                journal.unlink(missing_ok=True)
+            self.rollback()
+            raise
+        if self.sync:
+            for directory in directories:
+                fsync_path(directory)
+        for backup, _ in backups:
+            backup.unlink(missing_ok=True)
+        for tombstone in tombstones:
+            tombstone.unlink(missing_ok=True)
+        if journal is not None:
+            journal.unlink(missing_ok=True)
+        self.pending.clear()
+        self.moved.clear()
+        self.deleted.clear()
+        self._run_callbacks()
+
+    def rollback(self):
+        for temp in self.pending:
+            try:
+                if temp in self.moved:
+                    shutil.move(temp, self.moved[temp])
+                else:
+                    temp.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning('Failed to roll back %s: %s', temp, e)
+        self.pending.clear()
+        self.moved.clear()
+        self.deleted.clear()
+
+
+class DirectoryStorage(FileStorage):
+    """Stores every file as `directory/name`, the key is the path of the file.
+
+    Files with the same name overwrite each other. This is the default storage of `FormModel.save_files`.
+    """
+    def __init__(self, directory: Optional[str | PathLike] = None):
+        self.directory = directory
+
+    def save(self, name: str, write: ContentWriter) -> str:
+        if self.directory is None:
+            raise ValueError('DirectoryStorage needs a directory to save files')
+        path = Path(f'{self.directory}/{name}').as_posix()
+        try:
+            with open(path, 'wb') as f:
+                write(f)
+        except BaseException:
+            # no partially written file is left behind
+            Path(path).unlink(missing_ok=True)
+            raise
+        return path
+
+    def save_path(self, name: str, source: str | PathLike) -> str:
+        path = Path(f'{self.directory}/{name}')
+        # the file is already stored at its place, e.g. lazily loaded data
+        if path.exists() and path.samefile(source):
+            return path.as_posix()
+        try:
+            shutil.copyfile(source, path)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return path.as_posix()
+
+    def move_path(self, name: str, source: str | PathLike) -> str:
+        path = Path(f'{self.directory}/{name}')
+        # a rename on the same file system, the content is not read again
+        shutil.move(source, path)
+        return path.as_posix()
+
+    def open(self, key: str) -> BinaryIO:
+        return open(key, 'rb')
+
+    def delete(self, key: str, missing_ok: bool = False):
+        Path(key).unlink(missing_ok=missing_ok)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return Path(key)
+
+    def transaction(self, sync: bool = True) -> DirectoryTransaction:
+        return DirectoryTransaction(self, sync)
+
+    def recover(self) -> int:
+        """Complete the transactions that were interrupted by a crash, returns their number.
+
+        Commits whose journal was written are rolled forward: the remaining temporary files are
+        renamed into place and the deleted files, backups and tombstones are removed. Temporary
+        files of transactions that were not committed are removed. Call it at startup, before any
+        files are saved or deleted.
+        """
+        if self.directory is None:
+            raise ValueError('DirectoryStorage needs a directory to recover transactions')
+        directory = Path(self.directory)
+        recovered = 0
+        for journal in sorted(directory.glob(f'{JOURNAL_PREFIX}*.journal')):
+            entries = json.loads(journal.read_text())
+            directories = {directory}
+            for temp, target, backup in entries['replace']:
+                temp, target = directory / temp, directory / target
+                if temp.exists():
+                    os.replace(temp, target)
+                (directory / backup).unlink(missing_ok=True)
+                directories.add(target.parent)
+            for path, tombstone in entries['delete']:
+                (directory / path).unlink(missing_ok=True)
+                (directory / tombstone).unlink(missing_ok=True)
+            for parent in directories:
+                fsync_path(parent)
+            journal.unlink()
+            recovered += 1
+            logger.info('Recovered the interrupted transaction %s', journal.name)
+        for journal in directory.glob(f'{JOURNAL_PREFIX}*.journal.tmp'):
+            journal.unlink(missing_ok=True)
+        for path in directory.rglob('.*.tmp'):
+            if _HIDDEN_FILE.match(path.name):
+                path.unlink(missing_ok=True)
+        return recovered
+
+
+class HashingWriter:
+    """Writable stream that hashes everything written to the wrapped stream."""
+    def __init__(self, stream: BinaryIO, algorithm: str):
+        self.stream = stream
+        self.hash = hashlib.new(algorithm)
+
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        return self.stream.write(data)
+
+
+class ContentAddressedStorage(FileStorage):
+    """Stores every distinct content once, the key is the hash of the content.
+
+    The content is hashed while it is written to a temporary file, which is moved to
+    `directory/<hash[:2]>/<hash>` unless the blob already exists. Every save adds a reference
+    to the blob (kept in a `.refs` file next to it) and every delete removes one, the blob
+    is removed with its last reference.
+
+    The references are updated under an exclusive `flock` on `directory/.lock`, so several
+    processes (e.g. the workers of a server) can share the directory. Without `fcntl` (Windows)
+    only the threads of one process are synchronized and the directory must not be shared.
+    """
+    def __init__(self, directory: str | PathLike, algorithm: str = 'sha256'):
+        self.directory = Path(directory)
+        self.algorithm = algorithm
+        self._key = re.compile(f'[0-9a-f]{{{hashlib.new(algorithm).digest_size * 2}}}')
+        self._lock = threading.Lock()
+
+    def _check_key(self, key: str):
+        """Keys come from clients (the `path` of a file), only hex digests of the algorithm are used in paths."""
+        if not isinstance(key, str) or not self._key.fullmatch(key):
+            raise ValueError(f'Invalid {self.algorithm} key {key!r}')
+
+    def blob_path(self, key: str) -> Path:
+        self._check_key(key)
+        return self.directory / key[:2] / key
+
+    def _references_path(self, key: str) -> Path:
+        self._check_key(key)
+        return self.directory / key[:2] / f'{key}.refs'
+
+    def references(self, key: str) -> int:
+        try:
+            return int(self._references_path(key).read_text())
+        except FileNotFoundError:
+            return 1 if self.blob_path(key).exists() else 0
+
+    def _write_references(self, key: str, references: int):
+        # replaced atomically, so the count is never read half written
+        path = self._references_path(key)
+        temp = path.with_name(f'{path.name}.{uuid.uuid4().hex[:12]}.tmp')
+        temp.write_text(str(references))
+        os.replace(temp, path)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the references, across threads and the processes that share the directory."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / '.lock', 'ab') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save(self, name: str, write: ContentWriter) -> str:
+        temp_directory = self.directory / 'tmp'
+        temp_directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=temp_directory, delete=False) as f:
+            try:
+                writer = HashingWriter(f, self.algorithm)
+                write(writer)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        return self._add_blob(name, f.name, writer.hash.hexdigest())
+
+    def move_path(self, name: str, source: str | PathLike) -> str:
+        content_hash = hashlib.new(self.algorithm)
+        with open(source, 'rb') as f:
+            while block := f.read(1024 * 1024):
+                content_hash.update(block)
+        return self._add_blob(name, source, content_hash.hexdigest())
+
+    def _add_blob(self, name: str, source: str | PathLike, key: str) -> str:
+        with self._locked():
+            blob = self.blob_path(key)
+            references = self.references(key)
+            if references:
+                os.unlink(source)
+                logger.debug('%s is already stored as %s', name, key)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(source, blob)
+            self._write_references(key, references + 1)
+        return key
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.blob_path(key), 'rb')
+
+    def delete(self, key: str, missing_ok: bool = False):
+        with self._locked():
+            references = self.references(key)
+            if not references:
+                if missing_ok:
+                    return
+                raise FileNotFoundError(f'No blob stored for {key}')
+            if references > 1:
+                self._write_references(key, references - 1)
+                return
+            self.blob_path(key).unlink(missing_ok=True)
+            self._references_path(key).unlink(missing_ok=True)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self.blob_path(key)
+
+
+class MemoryTransaction(StorageTransaction):
+    """Transaction of a `MemoryStorage`, saved files are staged and only stored on `commit`."""
+    def __init__(self, storage: 'MemoryStorage'):
+        super().__init__(storage)
+        self.staged: dict[str, bytes] = {}
+
+    def save(self, name: str, write: ContentWriter) -> str:
+        stream = BytesIO()
+        write(stream)
+        with self._lock:
+            self.staged[name] = stream.getvalue()
+        return name
+
+    def save_path(self, name: str, source: str | PathLike) -> str:
+        return FileStorage.save_path(self, name, source)
+
+    def open(self, key: str) -> BinaryIO:
+        content = self.staged.get(key)
+        return BytesIO(content) if content is not None else self.storage.open(key)
+
+    def delete(self, key: str, missing_ok: bool = False):
+        if key not in self.storage.files:
+            if missing_ok:
+                return
+            raise FileNotFoundError(key)
+        super().delete(key, missing_ok)
+
+    def commit(self):
+        with self.storage._lock:
+            for key, _ in self.deleted:
+                self.storage.files.pop(key, None)
+            self.storage.files.update(self.staged)
+        self.staged.clear()
+        self.deleted.clear()
+        self._run_callbacks()
+
+    def rollback(self):
+        self.staged.clear()
+        self.deleted.clear()
+
+
+class MemoryStorage(FileStorage):
+    """Keeps the files in memory by name, e.g. for tests."""
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def save(self, name: str, write: ContentWriter) -> str:
+        stream = BytesIO()
+        write(stream)
+        with self._lock:
+            self.files[name] = stream.getvalue()
+        return name
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return BytesIO(self.files[key])
+        except KeyError:
+            raise FileNotFoundError(key) from None
+
+    def delete(self, key: str, missing_ok: bool = False):
+        with self._lock:
+            if self.files.pop(key, None) is None and not missing_ok:
+                raise FileNotFoundError(key)
+
+    def transaction(self, sync: bool = True) -> MemoryTransaction:
+        return MemoryTransaction(self)
@@ -2,9 +2,14 @@ from typing import Any, TypeVar, Generic
 
 from pydantic_core import core_schema
 from typing_extensions import get_args
-from pydantic import BaseModel, GetCoreSchemaHandler
-from typing import get_origin, Optional
+from pydantic import BaseModel, GetCoreSchemaHandler, PrivateAttr
+from typing import get_origin, Optional, Iterator, BinaryIO
 from os import PathLike
+from io import BytesIO
+import re, uuid
+from pydantic.json_schema import JsonSchemaValue
+from .base64_stream import DEFAULT_CHUNK_SIZE, b64encode_file, b64encode_from_stream
+from .spooling import SpooledFile
 
 T = TypeVar('T')
 
@@ -27,13 +32,153 @@ class File(Generic[T]):
     def save(self, path: PathLike):
         raise Exception('Not implemented')
 
+class LazyFileData:
+    """Deferred base64 data of a file stored at `path`.
+
+    The file is only read and encoded when the data is serialized (or `read` is called).
+    `FormModel.iter_json` streams the encoded file into the JSON output chunk by chunk.
+    """
+    def __init__(self, path: str | PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def read(self) -> str:
+        return b64encode_file(self.path, self.chunk_size)
+
+    def iter_chunks(self) -> Iterator[str]:
+        with open(self.path, 'rb') as f:
+            yield from b64encode_from_stream(f, self.chunk_size)
+
+    def __repr__(self) -> str:
+        return f'LazyFileData(path={self.path!r})'
+
+    @staticmethod
+    def serialize(value: 'LazyFileData', info: core_schema.SerializationInfo) -> str:
+        placeholders = info.context.get(LAZY_FILE_PLACEHOLDERS) if isinstance(info.context, dict) else None
+        if placeholders is None:
+            return value.read()
+        return placeholders.add(value)
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        return core_schema.is_instance_schema(
+            cls,
+            serialization=core_schema.plain_serializer_function_ser_schema(cls.serialize, info_arg=True)
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: core_schema.CoreSchema, handler) -> JsonSchemaValue:
+        return handler(core_schema.str_schema())
+
+# serialization context key, see FormModel.iter_json
+LAZY_FILE_PLACEHOLDERS = 'lazy_file_placeholders'
+
+class LazyFilePlaceholders:
+    """Replaces lazy file data with unique placeholders during serialization.
+
+    The serialized output is split at the placeholders afterwards and the files are streamed in their place.
+    """
+    def __init__(self):
+        self.prefix = f'lazy-file-{uuid.uuid4().hex}-'
+        self.pattern = re.compile(re.escape(self.prefix) + r'(\d+)')
+        self.values: list[LazyFileData] = []
+
+    def add(self, value: LazyFileData) -> str:
+        self.values.append(value)
+        return f'{self.prefix}{len(self.values) - 1}'
+
+    def stream(self, serialized: str) -> Iterator[str]:
+        position = 0
+        for match in self.pattern.finditer(serialized):
+            yield serialized[position:match.start()]
+            yield from self.values[int(match.group(1))].iter_chunks()
+            position = match.end()
+        yield serialized[position:]
+
 class Base64FileData(BaseModel):
-    data: Optional[str] = None
+    data: Optional[str | LazyFileData] = None
     name: Optional[str] = None
     
 
 class Base64File(Base64FileData, File[Base64FileData]):
     path: Optional[str|PathLike] = None
+    # id of a chunked upload that holds the content, see UploadManager
+    upload_id: Optional[str] = None
+
+class BinaryFile(BaseModel):
+    """File whose content is transferred as raw bytes instead of base64 encoded JSON.
+
+    Only the metadata is serialized, the content travels as multipart part or upload and is
+    attached to `data` (bytes, a readable binary stream such as `UploadFile.file`, a `SpooledFile`
+    or the path of a stored file). Saving streams the content to disk in chunks.
+
+    `data` is private: it is only set by `attach`/`from_upload` and when files are saved or loaded,
+    never validated from a payload, so a client can't make the server read a file by its path.
+    """
+    name: Optional[str] = None
+    path: Optional[str|PathLike] = None
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+    upload_id: Optional[str] = None
+    _data: Any = PrivateAttr(default=None)
+
+    @property
+    def data(self) -> Any:
+        return self._data
+
+    @data.setter
+    def data(self, data: Any):
+        self._data = data
+
+    @classmethod
+    def from_upload(cls, upload: Any) -> 'BinaryFile':
+        """Create a file from an uploaded file, e.g. FastAPI's / Starlette's `UploadFile`."""
+        file = cls(name=upload.filename, content_type=getattr(upload, 'content_type', None), size=getattr(upload, 'size', None))
+        file.data = upload.file
+        return file
+
+    def attach(self, content: Any):
+        """Attach uploaded content: bytes, a binary stream or an object with a `file` stream (`UploadFile`)."""
+        self.data = getattr(content, 'file', content)
+        if isinstance(self.data, (bytes, bytearray, SpooledFile)):
+            self.size = len(self.data) if isinstance(self.data, (bytes, bytearray)) else self.data.size
+
+    def open(self) -> BinaryIO:
+        if isinstance(self.data, (bytes, bytearray)):
+            return BytesIO(self.data)
+        if isinstance(self.data, (str, PathLike)):
+            return open(self.data, 'rb')
+        if isinstance(self.data, SpooledFile):
+            return self.data.open()
+        if self.data is not None:
+            return self.data
+        if self.path:
+            return open(self.path, 'rb')
+        raise ValueError(f'{self.name} has no data and is not stored on disk')
+
+    def read(self) -> bytes:
+        if isinstance(self.data, (bytes, bytearray)):
+            return bytes(self.data)
+        stream = self.open()
+        if stream is self.data:
+            return stream.read()
+        with stream:
+            return stream.read()
+
+    def copy_to(self, stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Write the content to `stream` in blocks of `chunk_size` bytes and return the number of bytes written."""
+        if isinstance(self.data, (bytes, bytearray)):
+            return stream.write(self.data)
+        source = self.open()
+        written = 0
+        try:
+            while block := source.read(chunk_size):
+                stream.write(block)
+                written += len(block)
+        finally:
+            if source is not self.data:
+                source.close()
+        return written
 
 class Custom(Generic[T]):
 
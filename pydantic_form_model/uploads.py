@@ -0,0 +1,161 @@
+from typing import BinaryIO, Optional
+from os import PathLike
+from pathlib import Path
+import logging
+import os
+import threading
+import time
+import uuid
+from .form_fields import BaseSchema
+from .exceptions import UploadException
+
+logger = logging.getLogger(__name__)
+
+# chunk size of chunked uploads if the field does not declare one
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class Upload(BaseSchema):
+    upload_id: str
+    name: str
+    size: int
+    chunk_size: int
+    received: list[int] = []
+    finalized: bool = False
+
+    @property
+    def chunk_count(self) -> int:
+        return max(-(-self.size // self.chunk_size), 1)
+
+    @property
+    def missing(self) -> list[int]:
+        received = set(self.received)
+        return [index for index in range(self.chunk_count) if index not in received]
+
+    def chunk_length(self, index: int) -> int:
+        if index == self.chunk_count - 1:
+            return self.size - index * self.chunk_size
+        return self.chunk_size
+
+
+class UploadManager:
+    """Chunked, resumable uploads assembled in `directory`.
+
+    A client opens an upload with the name and size of the file and gets an upload id. It then
+    sends numbered chunks in any order, which are written to their offset in `<id>.part`;
+    chunks that are sent again overwrite themselves, so an interrupted upload is resumed by
+    sending the chunks that `status(...).missing` lists. After `finalize`, a form submission
+    refers to the upload by setting `upload_id` of its file and `FormModel.save_files(uploads=...)`
+    moves the assembled file into the storage.
+    """
+    def __init__(self, directory: str | PathLike, chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE, max_size: Optional[int] = None):
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _is_upload_id(upload_id: str) -> bool:
+        try:
+            return uuid.UUID(hex=upload_id).hex == upload_id
+        except (TypeError, ValueError, AttributeError):
+            return False
+
+    @classmethod
+    def _check_upload_id(cls, upload_id: str):
+        """Upload ids come from clients, only the ids handed out by `open` are used in paths."""
+        if not cls._is_upload_id(upload_id):
+            raise UploadException(f'Invalid upload id {upload_id!r}')
+
+    def _part_path(self, upload_id: str) -> Path:
+        self._check_upload_id(upload_id)
+        return self.directory / f'{upload_id}.part'
+
+    def _meta_path(self, upload_id: str) -> Path:
+        self._check_upload_id(upload_id)
+        return self.directory / f'{upload_id}.json'
+
+    def _store(self, upload: Upload):
+        meta_path = self._meta_path(upload.upload_id)
+        temp_path = meta_path.with_suffix('.json.tmp')
+        temp_path.write_text(upload.model_dump_json())
+        os.replace(temp_path, meta_path)
+
+    def open(self, name: str, size: int, chunk_size: Optional[int] = None, max_size: Optional[int] = None) -> Upload:
+        max_size = max_size if max_size is not None else self.max_size
+        if size < 0 or (max_size is not None and size > max_size):
+            raise UploadException(f'{name}: size {size} exceeds the maximum of {max_size} bytes' if size >= 0 else f'{name}: invalid size {size}')
+        upload = Upload(upload_id=uuid.uuid4().hex, name=name, size=size, chunk_size=chunk_size or self.chunk_size)
+        with open(self._part_path(upload.upload_id), 'wb') as f:
+            f.truncate(size)
+        self._store(upload)
+        logger.debug('opened upload %s for %s (%s bytes)', upload.upload_id, name, size)
+        return upload
+
+    def status(self, upload_id: str) -> Upload:
+        try:
+            return Upload.model_validate_json(self._meta_path(upload_id).read_text())
+        except (FileNotFoundError, ValueError):
+            raise UploadException(f'Unknown upload {upload_id}') from None
+
+    def write_chunk(self, upload_id: str, index: int, data: bytes | BinaryIO) -> Upload:
+        upload = self.status(upload_id)
+        if upload.finalized:
+            raise UploadException(f'Upload {upload_id} is already finalized')
+        if not 0 <= index < upload.chunk_count:
+            raise UploadException(f'Upload {upload_id} has no chunk {index}')
+        expected = upload.chunk_length(index)
+        if not isinstance(data, (bytes, bytearray)):
+            data = data.read(expected + 1)
+        if len(data) != expected:
+            raise UploadException(f'Chunk {index} of upload {upload_id} has {len(data)} bytes, expected {expected}')
+        with open(self._part_path(upload_id), 'r+b') as f:
+            f.seek(index * upload.chunk_size)
+            f.write(data)
+        with self._lock:
+            upload = self.status(upload_id)
+            if index not in upload.received:
+                upload.received = sorted(upload.received + [index])
+                self._store(upload)
+        return upload
+
+    def finalize(self, upload_id: str) -> Upload:
+        with self._lock:
+            upload = self.status(upload_id)
+            missing = upload.missing
+            if missing:
+                raise UploadException(f'Upload {upload_id} is missing {len(missing)} chunk(s), first missing chunk: {missing[0]}')
+            upload.finalized = True
+            self._store(upload)
+        return upload
+
+    def path(self, upload_id: str) -> Path:
+        """Path of the assembled file of a finalized upload."""
+        if not self.status(upload_id).finalized:
+            raise UploadException(f'Upload {upload_id} is not finalized')
+        return self._part_path(upload_id)
+
+    def release(self, upload_id: str):
+        """Forget an upload whose file was moved into a storage."""
+        self._meta_path(upload_id).unlink(missing_ok=True)
+        self._part_path(upload_id).unlink(missing_ok=True)
+
+    def abort(self, upload_id: str):
+        self.status(upload_id)
+        self.release(upload_id)
+
+    def cleanup(self, max_age: float) -> int:
+        """Remove uploads that were not written to for `max_age` seconds, returns the number of removed uploads."""
+        removed = 0
+        deadline = time.time() - max_age
+        for meta_path in self.directory.glob('*.json'):
+            upload_id = meta_path.stem
+            if not self._is_upload_id(upload_id):
+                continue
+            part_path = self._part_path(upload_id)
+            last_write = max(meta_path.stat().st_mtime, part_path.stat().st_mtime if part_path.exists() else 0)
+            if last_write < deadline:
+                self.release(upload_id)
+                removed += 1
+        return removed
@@ -0,0 +1,291 @@
+from typing import Any, Callable, Container, Iterable, Iterator, Optional
+from operator import attrgetter, itemgetter
+import logging
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import PydanticCustomError
+from .form_fields import BaseSchema, ValidationRule, ValidationRuleName
+from .exceptions import InvalidDefinitionException
+
+logger = logging.getLogger(__name__)
+
+# error type of the errors raised for failed validation rules
+RULES_ERROR_TYPE = 'validation_rules'
+
+# rules that pydantic already enforces through the field annotation and constraints
+CONSTRAINT_RULES = {
+    ValidationRuleName.REQUIRED,
+    ValidationRuleName.MIN_LENGTH,
+    ValidationRuleName.MAX_LENGTH,
+    ValidationRuleName.GREATER_THAN,
+    ValidationRuleName.LESS_THAN,
+}
+
+# pydantic error types reported for the constraint rules
+PYDANTIC_ERROR_RULES = {
+    'missing': ValidationRuleName.REQUIRED,
+    'string_too_short': ValidationRuleName.MIN_LENGTH,
+    'too_short': ValidationRuleName.MIN_LENGTH,
+    'string_too_long': ValidationRuleName.MAX_LENGTH,
+    'too_long': ValidationRuleName.MAX_LENGTH,
+    'greater_than': ValidationRuleName.GREATER_THAN,
+    'less_than': ValidationRuleName.LESS_THAN,
+}
+
+Check = Callable[[Any], bool]
+
+
+def is_empty(value: Any) -> bool:
+    return value is None or value == '' or (isinstance(value, (list, tuple, set, dict)) and not value)
+
+
+def has_value(value: Any) -> bool:
+    # an unchecked boolean counts as no value for the conditions of other fields
+    return not is_empty(value) and value is not False
+
+
+def format_path(loc: Iterable[str | int]) -> str:
+    path = ''
+    for part in loc:
+        if isinstance(part, int):
+            path += f'[{part}]'
+        else:
+            path += f'.{part}' if path else part
+    return path
+
+
+def other_field_condition(rule: ValidationRule, get_other: Callable[[Any], Any]) -> Check:
+    if rule.has_value is False:
+        return lambda model: not has_value(get_other(model))
+    return lambda model: has_value(get_other(model))
+
+
+def compile_check(rule: ValidationRule, get_value: Callable[[Any], Any], get_field: Callable[[str], Callable[[Any], Any]]) -> Check:
+    """Compile a validation rule into a check that returns whether a model instance is valid."""
+    name = rule.name
+    if name == ValidationRuleName.REQUIRED:
+        return lambda model: not is_empty(get_value(model))
+    if name == ValidationRuleName.REQUIRED_IF:
+        condition = other_field_condition(rule, get_field(rule.other_field_name))
+        return lambda model: not condition(model) or not is_empty(get_value(model))
+    if name == ValidationRuleName.REQUIRED_UNLESS:
+        condition = other_field_condition(rule, get_field(rule.other_field_name))
+        return lambda model: condition(model) or not is_empty(get_value(model))
+    if name == ValidationRuleName.SAME_AS:
+        get_other = get_field(rule.other_field_name)
+        return lambda model: get_value(model) == get_other(model)
+    if name == ValidationRuleName.MIN_LENGTH:
+        length = rule.length
+        return lambda model: (value := get_value(model)) is None or len(value) >= length
+    if name == ValidationRuleName.MAX_LENGTH:
+        length = rule.length
+        return lambda model: (value := get_value(model)) is None or len(value) <= length
+    if name == ValidationRuleName.GREATER_THAN:
+        limit = rule.value
+        return lambda model: (value := get_value(model)) is None or value > limit
+    if name == ValidationRuleName.LESS_THAN:
+        limit = rule.value
+        return lambda model: (value := get_value(model)) is None or value < limit
+    raise InvalidDefinitionException(f'Unsupported validation rule {name}')
+
+
+class RuleValidator:
+    """Validation rules of a FormModel class compiled into checks.
+
+    Field accessors and checks are resolved once when the validator is built. Only rules that are not
+    already enforced by pydantic itself (cross-field rules and additional rules passed to `FField`) are
+    executed, the remaining rules are used to map pydantic errors to their `error_text`.
+    """
+    def __init__(self, model_cls: type, rules: dict[str, list[ValidationRule]], executed_rules: dict[str, list[ValidationRule]]):
+        self.model_cls = model_cls
+        self.rules = {field_name: {rule.name: rule for rule in field_rules} for field_name, field_rules in rules.items()}
+        self.aliases = {field_info.alias: field_name for field_name, field_info in model_cls.model_fields.items() if field_info.alias}
+        self.checks: list[tuple[str, ValidationRule, Check]] = []
+        for field_name, field_rules in executed_rules.items():
+            get_value = attrgetter(field_name)
+            for rule in field_rules:
+                try:
+                    check = compile_check(rule, get_value, self.get_field_accessor)
+                except InvalidDefinitionException as e:
+                    # reported once per build, the rule is still part of the form definition
+                    logger.warning('%s: rule %s of %s is not validated: %s', model_cls.__name__, rule.name, field_name, e)
+                    continue
+                self.checks.append((field_name, rule, check))
+
+    def resolve_path(self, path: Optional[str]) -> tuple[str | int, ...]:
+        """Resolve a field path relative to the model (e.g. `address.zipCode`) to field names."""
+        from .render_conditions import parse_path
+        owner = self.model_cls
+        resolved: list[str | int] = []
+        for part in parse_path(path or ''):
+            if isinstance(part, int) and resolved:
+                resolved.append(part)
+                continue
+            fields = owner.model_fields if owner is not None and isinstance(part, str) else {}
+            field_name = part if part in fields else next((name for name, info in fields.items() if info.alias == part), None)
+            if field_name is None:
+                raise InvalidDefinitionException(f'validation rule refers to unknown field {path}')
+            resolved.append(field_name)
+            owner = owner.get_sub_form(field_name)
+        if not resolved:
+            raise InvalidDefinitionException('validation rule refers to no field')
+        return tuple(resolved)
+
+    def get_field_accessor(self, path: Optional[str]) -> Callable[[Any], Any]:
+        parts = self.resolve_path(path)
+        if len(parts) == 1:
+            return attrgetter(parts[0])
+        from .render_conditions import compile_accessor, _MISSING
+        get = compile_accessor(parts)
+        return lambda model: None if (value := get(model)) is _MISSING else value
+
+    def field_name(self, name: str) -> str:
+        return self.aliases.get(name, name)
+
+    def validate(self, model: Any, skip: Container[str] = ()) -> dict[str, list[str]]:
+        """Run the checks on a model instance and return the error texts by field name.
+
+        Fields in `skip` are not checked.
+        """
+        errors: dict[str, list[str]] = {}
+        for field_name, rule, check in self.checks:
+            if field_name in skip:
+                continue
+            if not check(model):
+                errors.setdefault(field_name, []).append(rule.error_text)
+        return errors
+
+    def raise_for_errors(self, model: Any, skip: Container[str] = ()):
+        errors = self.validate(model, skip)
+        if errors:
+            message = '; '.join(error_text for error_texts in errors.values() for error_text in error_texts)
+            raise PydanticCustomError(RULES_ERROR_TYPE, '{message}', {'message': message, 'errors': errors})
+
+
+class FieldValidationResult(BaseSchema):
+    path: str
+    valid: bool
+    errors: list[str] = []
+
+
+class FieldValidator:
+    """Validator of a single value at a field path, e.g. while a user is typing.
+
+    The value is validated by a TypeAdapter of the field annotation (with its constraints) and by the
+    validation rules of the field. Rules that refer to other fields read them from `siblings`, the
+    values of the form that owns the field (a model instance or a raw dict); missing fields count as
+    empty.
+    """
+    def __init__(self, annotation: Any, rules: dict[str, ValidationRule], executed_rules: list[ValidationRule], aliases: dict[str, str], owner_depth: int, sub_form: Optional[type] = None):
+        self.adapter = TypeAdapter(annotation)
+        # errors of a whole sub-form are mapped to the error texts of its rules
+        self.sub_form = sub_form
+        self.rules = rules
+        self.required = rules.get(ValidationRuleName.REQUIRED)
+        # field name -> alias, to look up siblings in raw payloads
+        self.aliases = {field_name: alias for alias, field_name in aliases.items()}
+        # number of path parts that lead to the form owning the field
+        self.owner_depth = owner_depth
+        self.checks = [(rule, compile_check(rule, itemgetter(0), self.get_sibling_accessor)) for rule in executed_rules]
+
+    def get_sibling_accessor(self, field_name: Optional[str]) -> Callable[[tuple], Any]:
+        from .render_conditions import parse_path, compile_accessor, _MISSING
+        parts = parse_path(field_name or '')
+        if len(parts) > 1:
+            # a path into a sub-form of the owner
+            get_path = compile_accessor(parts)
+            return lambda context: None if context[1] is None or (value := get_path(context[1])) is _MISSING else value
+        field_name = {alias: name for name, alias in self.aliases.items()}.get(field_name, field_name)
+        alias = self.aliases.get(field_name, field_name)
+        def get(context: tuple) -> Any:
+            siblings = context[1]
+            if siblings is None:
+                return None
+            if isinstance(siblings, dict):
+                return siblings[field_name] if field_name in siblings else siblings.get(alias)
+            return getattr(siblings, field_name, None)
+        return get
+
+    def error_text(self, line: dict) -> str:
+        rule = self.rules.get(PYDANTIC_ERROR_RULES.get(line['type']))
+        return rule.error_text if rule is not None else line['msg']
+
+    def validate(self, value: Any, siblings: Any = None) -> list[str]:
+        """Error texts of the value, empty if it is valid."""
+        if self.required is not None and is_empty(value):
+            return [self.required.error_text]
+        try:
+            value = self.adapter.validate_python(value)
+        except ValidationError as e:
+            if self.sub_form is not None:
+                return [text for _, _, _, text, _ in iter_field_errors(self.sub_form, e.errors())]
+            return [self.error_text(line) for line in e.errors()]
+        if not self.checks:
+            return []
+        context = (value, siblings)
+        return [rule.error_text for rule, check in self.checks if not check(context)]
+
+
+def resolve_location(model_cls: type, loc: tuple) -> tuple[Optional[type], Optional[str], tuple]:
+    """Resolve a pydantic error location to the FormModel class and field it belongs to.
+
+    Returns the class, the field name (None for errors of the model itself) and the location with field names.
+    """
+    path = []
+    field_name = None
+    for part in loc:
+        if isinstance(part, int):
+            path.append(part)
+            continue
+        if field_name is not None:
+            model_cls = model_cls.get_sub_form(field_name) if model_cls is not None else None
+        field_name = model_cls.get_rule_validator().field_name(part) if model_cls is not None else part
+        path.append(field_name)
+    if field_name is not None and model_cls is not None and field_name not in model_cls.model_fields:
+        return None, None, tuple(path)
+    return model_cls, field_name, tuple(path)
+
+
+def iter_field_errors(model_cls: type, errors: Iterable[dict]) -> Iterator[tuple[Optional[type], Optional[str], tuple, str, str]]:
+    """Resolve pydantic error lines to `(FormModel class, field name, field path, error text, error type)`.
+
+    Errors of validation rules and of constraints that correspond to a rule are reported with the `error_text` of the rule.
+    """
+    for line in errors:
+        loc = line['loc']
+        if line['type'] == RULES_ERROR_TYPE:
+            owner, field_name, path = resolve_location(model_cls, loc)
+            if owner is not None and field_name is not None:
+                # the error is raised by the sub-form at the location
+                owner = owner.get_sub_form(field_name)
+            for field_name, texts in line['ctx']['errors'].items():
+                for text in texts:
+                    yield owner, field_name, path + (field_name,), text, line['type']
+            continue
+        owner, field_name, path = resolve_location(model_cls, loc)
+        text = line['msg']
+        rule_name = PYDANTIC_ERROR_RULES.get(line['type'])
+        if owner is not None and field_name is not None and rule_name is not None:
+            rule = owner.get_rule_validator().rules.get(field_name, {}).get(rule_name)
+            if rule is not None:
+                text = rule.error_text
+        yield owner, field_name, path, text, line['type']
+
+
+def error_texts(model_cls: type, error: ValidationError) -> dict[str, list[str]]:
+    """Map the errors of a failed validation to the `error_text` of the matching validation rules, keyed by field path."""
+    result: dict[str, list[str]] = {}
+    for _, _, path, text, _ in iter_field_errors(model_cls, error.errors()):
+        result.setdefault(format_path(path), []).append(text)
+    return result
+
+
+def validate_many(model_cls: type, items: Iterable[Any]) -> list[dict[str, list[str]]]:
+    """Validate many submissions and return the error texts by field path for each of them (empty if valid)."""
+    results = []
+    for item in items:
+        try:
+            model_cls.model_validate(item)
+            results.append({})
+        except ValidationError as e:
+            results.append(error_texts(model_cls, e))
+    return results
@@ -0,0 +1,139 @@
+import base64
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from unittest import mock
+import pytest
+from pydantic_form_model import DirectoryStorage, FormModel
+from pydantic_form_model.form_fields import Base64File
+import pydantic_form_model.storage as storage_module
+
+ROOT = Path(__file__).resolve().parents[1]
+NAMES = ['a.txt', 'b.txt', 'c.txt', 'd.txt']
+
+
+class FilesForm(FormModel, register=False):
+    files: list[Base64File] = []
+
+
+def encode(content: bytes) -> str:
+    return base64.b64encode(content).decode()
+
+
+def new_form(names: list[str] = NAMES) -> FilesForm:
+    return FilesForm(files=[Base64File(name=name, data=encode(f'new {name}'.encode())) for name in names])
+
+
+def write_old_files(directory: Path):
+    for name in NAMES:
+        (directory / name).write_bytes(f'old {name}'.encode())
+
+
+def contents(directory: Path) -> dict[str, bytes]:
+    return {path.name: path.read_bytes() for path in sorted(directory.iterdir()) if path.is_file()}
+
+
+def old_contents() -> dict[str, bytes]:
+    return {name: f'old {name}'.encode() for name in NAMES}
+
+
+def new_contents() -> dict[str, bytes]:
+    return {name: f'new {name}'.encode() for name in NAMES}
+
+
+def test_failed_write_leaves_files_unchanged(tmp_path):
+    write_old_files(tmp_path)
+    form = new_form()
+    # the third file fails after its first block was written
+    form.files[2].data = encode(b'x' * 100) + 'a'
+    with pytest.raises(ValueError):
+        form.save_files(tmp_path, atomic=True)
+    assert contents(tmp_path) == old_contents()
+    assert [file.path for file in form.files] == [None] * 4
+
+
+@pytest.mark.parametrize('failing', NAMES)
+def test_failed_rename_is_undone(tmp_path, failing):
+    write_old_files(tmp_path)
+    replace = os.replace
+
+    def failing_replace(source, target):
+        if str(source).endswith('.tmp') and Path(target).name == failing:
+            raise OSError('injected failure')
+        return replace(source, target)
+
+    with mock.patch.object(storage_module.os, 'replace', failing_replace):
+        with pytest.raises(OSError):
+            new_form().save_files(tmp_path, atomic=True)
+    # no backups, temporary files or journals are left behind
+    assert contents(tmp_path) == old_contents()
+
+
+def crash(directory: Path, patch: str, action: str = 'save'):
+    """Run an atomic save (or delete) of new_form in a process that dies at the patched call."""
+    setup = (
+        'import os, sys\n'
+        f'sys.path[:0] = [{str(ROOT)!r}, {str(Path(__file__).parent)!r}]\n'
+        'import pydantic_form_model.storage as storage_module\n'
+        'from test_atomic_save import new_form\n'
+    )
+    run = (
+        f'directory = {str(directory)!r}\n'
+        'form = new_form()\n'
+        + ('form.save_files(directory, atomic=True)\n' if action == 'save' else
+           "for file in form.files:\n    file.path = f'{directory}/{file.name}'\n"
+           'form.delete_files(atomic=True)\n')
+        + 'sys.exit(3)\n'
+    )
+    script = setup + textwrap.dedent(patch) + '\n' + run
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    assert result.returncode == 1, result.stderr
+
+
+# dies like a killed process, without undoing anything
+CRASH_ON_THIRD_RENAME = '''
+replace = os.replace
+calls = []
+def crashing_replace(source, target):
+    if str(source).endswith('.tmp') and not str(source).endswith('.journal.tmp'):
+        calls.append(target)
+        if len(calls) == 3:
+            os._exit(1)
+    return replace(source, target)
+storage_module.os.replace = crashing_replace
+'''
+
+
+def test_crash_during_renames_is_recovered(tmp_path):
+    write_old_files(tmp_path)
+    crash(tmp_path, CRASH_ON_THIRD_RENAME)
+    stored = contents(tmp_path)
+    assert {stored[name] for name in NAMES} == {b'old c.txt', b'old d.txt', b'new a.txt', b'new b.txt'}
+    assert DirectoryStorage(tmp_path).recover() == 1
+    assert contents(tmp_path) == new_contents()
+
+
+def test_crash_before_journal_keeps_old_files(tmp_path):
+    write_old_files(tmp_path)
+    crash(tmp_path, 'storage_module.DirectoryTransaction._write_journal = lambda *args: os._exit(1)')
+    assert DirectoryStorage(tmp_path).recover() == 0
+    assert contents(tmp_path) == old_contents()
+
+
+def test_crash_during_delete_is_recovered(tmp_path):
+    write_old_files(tmp_path)
+    crash(tmp_path, '''
+rename = os.rename
+calls = []
+def crashing_rename(source, target):
+    calls.append(target)
+    if len(calls) == 2:
+        os._exit(1)
+    return rename(source, target)
+storage_module.os.rename = crashing_rename
+''', action='delete')
+    assert len([name for name in NAMES if (tmp_path / name).exists()]) == 3
+    assert DirectoryStorage(tmp_path).recover() == 1
+    assert contents(tmp_path) == {}
@@ -0,0 +1,34 @@
+from pydantic import field_validator
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import FField
+
+calls = []
+
+
+class ImportForm(FormModel, register=False):
+    name: str = FField(label='Name')
+    age: int
+
+    @field_validator('name')
+    @classmethod
+    def count_calls(cls, value):
+        calls.append(value)
+        return value
+
+
+def test_rows_are_validated_once():
+    calls.clear()
+    rows = [{'name': 'a', 'age': 1}, {'name': 'b', 'age': 'x'}, {'name': 'c', 'age': 3}, {'age': 4}]
+    result = ImportForm.validate_batch(rows)
+    assert calls == ['a', 'b', 'c']
+    assert [instance.name for instance in result.valid] == ['a', 'c']
+    assert result.valid_rows == [0, 2]
+    assert result.failed_rows == [1, 3]
+    assert [(error.row, error.path, error.label) for error in result.errors] == [(1, 'age', None), (3, 'name', 'Name')]
+
+
+def test_row_numbers_across_chunks():
+    rows = [{'name': str(row), 'age': 'x' if row % 3 == 0 else row} for row in range(10)]
+    results = list(ImportForm.iter_validate_batches(rows, batch_size=4))
+    assert [result.valid_rows for result in results] == [[1, 2], [4, 5, 7], [8]]
+    assert [result.failed_rows for result in results] == [[0, 3], [6], [9]]
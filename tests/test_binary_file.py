@@ -0,0 +1,25 @@
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import BinaryFile
+
+
+class ScanForm(FormModel, register=False):
+    scan: BinaryFile
+
+
+def test_data_is_not_validated_from_payload(tmp_path):
+    secret = tmp_path / 'secret'
+    secret.write_bytes(b'secret')
+    uploads = tmp_path / 'uploads'
+    uploads.mkdir()
+    form = ScanForm.model_validate({'scan': {'name': 'scan.bin', 'data': str(secret)}})
+    assert form.scan.data is None
+    form.save_files(uploads)
+    assert not list(uploads.iterdir())
+
+
+def test_attached_data_is_saved(tmp_path):
+    form = ScanForm.model_validate({'scan': {'name': 'scan.bin'}})
+    form.attach_files({'scan.bin': b'content'})
+    form.save_files(tmp_path)
+    assert (tmp_path / 'scan.bin').read_bytes() == b'content'
+    assert 'data' not in form.model_dump()['scan']
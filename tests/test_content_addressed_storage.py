@@ -0,0 +1,39 @@
+import base64
+import pytest
+from pydantic_form_model import ContentAddressedStorage, FormModel
+from pydantic_form_model.form_fields import Base64File
+
+
+class FilesForm(FormModel, register=False):
+    files: list[Base64File] = []
+
+
+def encode(content: bytes) -> str:
+    return base64.b64encode(content).decode()
+
+
+def test_same_content_is_stored_once(tmp_path):
+    storage = ContentAddressedStorage(tmp_path / 'store')
+    form = FilesForm(files=[Base64File(name='a', data=encode(b'same')), Base64File(name='b', data=encode(b'same'))])
+    form.save_files(storage=storage)
+    key = form.files[0].path
+    assert form.files[1].path == key
+    assert storage.references(key) == 2
+    form.delete_files(storage=storage)
+    assert storage.references(key) == 0
+    assert not storage.blob_path(key).exists()
+
+
+@pytest.mark.parametrize('key', ['../victim', '../../victim', 'ab', 'a' * 64 + '/..', 'A' * 64, '0' * 40])
+def test_keys_outside_the_store_are_rejected(tmp_path, key):
+    victim = tmp_path / 'victim'
+    victim.write_bytes(b'secret')
+    storage = ContentAddressedStorage(tmp_path / 'store')
+    with pytest.raises(ValueError):
+        storage.references(key)
+    form = FilesForm.model_validate({'files': [{'name': 'victim', 'path': key}]})
+    with pytest.raises(ValueError):
+        form.load_files(storage=storage)
+    with pytest.raises(ValueError):
+        form.delete_files(storage=storage)
+    assert victim.read_bytes() == b'secret'
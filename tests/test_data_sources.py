@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from pydantic_form_model.data_sources import DataSourceRegistry
+import pydantic_form_model.data_sources as data_sources_module
+from pydantic_form_model.exceptions import DataSourceException
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(data_sources_module.time, 'monotonic', clock)
+    return clock
+
+
+def counting_registry(**options) -> tuple[DataSourceRegistry, list]:
+    registry = DataSourceRegistry(**options)
+    calls = []
+
+    @registry.register('countries')
+    def countries(region: str = 'all'):
+        calls.append(region)
+        return [f'{region}-{len(calls)}']
+    return registry, calls
+
+
+def test_results_are_cached_for_ttl(clock):
+    registry, calls = counting_registry(ttl=10)
+    assert asyncio.run(registry.resolve('countries')) == ['all-1']
+    clock.now = 9
+    assert asyncio.run(registry.resolve('countries')) == ['all-1']
+    clock.now = 11
+    assert asyncio.run(registry.resolve('countries')) == ['all-2']
+    assert calls == ['all', 'all']
+
+
+def test_resolver_ttl_overrides_registry_ttl(clock):
+    registry = DataSourceRegistry(ttl=100)
+    registry.register('now', lambda: clock.now, ttl=1)
+    assert asyncio.run(registry.resolve('now')) == 0
+    clock.now = 2
+    assert asyncio.run(registry.resolve('now')) == 2
+
+
+def test_least_recently_used_results_are_evicted(clock):
+    registry, calls = counting_registry(max_entries=2)
+
+    async def resolve(*regions):
+        return [await registry.resolve('countries', region=region) for region in regions]
+    asyncio.run(resolve('eu', 'us', 'eu', 'asia', 'eu', 'us'))
+    # us was evicted by asia, eu stayed because it was used again
+    assert calls == ['eu', 'us', 'asia', 'us']
+
+
+def test_concurrent_requests_share_one_call():
+    registry = DataSourceRegistry()
+    calls = []
+
+    @registry.register('slow')
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ['a']
+
+    async def main():
+        return await asyncio.gather(*(registry.resolve('slow') for _ in range(5)))
+    assert asyncio.run(main()) == [['a']] * 5
+    assert calls == [1]
+
+
+def test_cancelling_the_first_request_keeps_the_others():
+    registry = DataSourceRegistry()
+
+    @registry.register('slow')
+    async def slow():
+        await asyncio.sleep(0.02)
+        return ['a']
+
+    async def main():
+        first = asyncio.create_task(registry.resolve('slow'))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(registry.resolve('slow'))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+    assert asyncio.run(main()) == ['a']
+
+
+def test_failures_reach_every_request():
+    registry = DataSourceRegistry()
+    calls = []
+
+    @registry.register('broken')
+    async def broken():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('unavailable')
+
+    async def main():
+        return await asyncio.gather(*(registry.resolve('broken') for _ in range(3)), return_exceptions=True)
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert calls == [1]
+    # failures are not cached
+    asyncio.run(main())
+    assert calls == [1, 1]
+
+
+def test_unknown_data_source():
+    with pytest.raises(DataSourceException):
+        asyncio.run(DataSourceRegistry().resolve('missing'))
@@ -0,0 +1,38 @@
+from typing import Optional
+import pytest
+from pydantic_form_model import FormModel
+from pydantic_form_model.exceptions import FormModelException
+
+
+class Item(FormModel, register=False):
+    title: str
+
+
+class ListForm(FormModel, register=False):
+    name: Optional[str] = None
+    items: list[Item] = []
+
+
+def cached_validators() -> dict:
+    return ListForm.__dict__['__field_validators__'][1]
+
+
+def test_spellings_of_a_path_share_one_validator():
+    validator = ListForm.get_field_validator('name')
+    for path in ('.name', '..name', '.' * 100 + 'name', 'name.'):
+        assert ListForm.get_field_validator(path) is validator
+    for index in range(100):
+        ListForm.get_field_validator(f'items[{index}].title')
+    assert len(cached_validators()) == 2
+
+
+def test_invalid_paths_are_not_cached():
+    ListForm.get_field_validator('name')
+    with pytest.raises(FormModelException):
+        ListForm.get_field_validator('missing')
+    assert ('missing',) not in cached_validators()
+
+
+def test_validate_list_item_field():
+    assert ListForm.validate_field('items[3].title', 'x').valid
+    assert not ListForm.validate_field('items[3].title', None).valid
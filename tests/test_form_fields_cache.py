@@ -0,0 +1,29 @@
+import pytest
+from pydantic import ValidationError
+from pydantic_form_model import FormModel
+
+
+class Inner(FormModel, register=False):
+    street: str
+
+
+class Outer(FormModel, register=False):
+    inner: Inner
+    name: str
+
+
+def test_cached_fields_are_shared_and_frozen():
+    form_fields = Outer.get_form_fields()
+    assert form_fields[0] is Outer.get_form_fields()[0]
+    with pytest.raises(ValidationError):
+        form_fields[1].label = 'changed'
+    with pytest.raises(ValidationError):
+        form_fields[0].item_properties[0].label = 'changed'
+    form_fields.pop()
+    assert len(Outer.get_form_fields()) == 2
+
+
+def test_changed_copy_keeps_cache():
+    changed = Outer.get_form_fields()[1].model_copy(update={'label': 'changed'})
+    assert changed.label == 'changed'
+    assert Outer.get_form_fields()[1].label != 'changed'
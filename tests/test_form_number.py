@@ -0,0 +1,20 @@
+from typing import Optional, Union
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import FormFieldType
+from pydantic_form_model.types import FormNumber
+
+
+class NumberForm(FormModel, register=False):
+    amount: FormNumber
+    ratio: Union[int, float]
+    limit: Optional[FormNumber] = None
+    count: int
+
+
+def test_form_number_fields():
+    form_fields = NumberForm.get_form_fields()
+    assert [form_field.field_type for form_field in form_fields] == [FormFieldType.NUMBER] * 4
+
+
+def test_form_number_multipart_form():
+    assert NumberForm.as_multipart_form().__name__ == 'MultipartNumberForm'
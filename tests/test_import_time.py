@@ -0,0 +1,11 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_import_is_fast_and_lazy():
+    # fresh interpreters, so modules imported by the test session don't count
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.import_time', '--runs', '5'], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
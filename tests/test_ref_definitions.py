@@ -0,0 +1,43 @@
+import json
+from typing import Optional
+from pydantic_form_model import FormModel
+
+
+class Address(FormModel, register=False):
+    street: str
+    city: str
+
+
+class Node(FormModel, register=False):
+    name: str
+    address: Optional[Address] = None
+    children: list['Node'] = []
+
+
+class Company(FormModel, register=False):
+    office: Address
+    branches: list[Address] = []
+    root: Optional[Node] = None
+
+
+def ref_definition(model: type[FormModel]) -> dict:
+    return json.loads(model.get_form_definition(refs=True).json)
+
+
+def test_recursive_root_is_not_repeated():
+    definition = ref_definition(Node)
+    assert definition['ref'] == 'test_ref_definitions.Node'
+    assert [field['name'] for field in definition['fields']] == ['name', 'address', 'children']
+    address, children = definition['fields'][1], definition['fields'][2]
+    assert address['ref'] == 'test_ref_definitions.Address'
+    assert children['itemDefinition']['ref'] == 'test_ref_definitions.Node'
+    # the root is only contained as `fields`, the shared sub-form once in the table
+    assert list(definition['definitions']) == ['test_ref_definitions.Address']
+    assert [field['name'] for field in definition['definitions']['test_ref_definitions.Address']] == ['street', 'city']
+
+
+def test_shared_sub_forms_are_contained_once():
+    definition = ref_definition(Company)
+    assert definition['ref'] == 'test_ref_definitions.Company'
+    assert sorted(definition['definitions']) == ['test_ref_definitions.Address', 'test_ref_definitions.Node']
+    assert Company.get_form_definition(refs=True).ref == 'test_ref_definitions.Company'
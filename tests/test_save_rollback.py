@@ -0,0 +1,54 @@
+import base64
+import pytest
+from pydantic_form_model import FormModel, MemoryStorage
+from pydantic_form_model.form_fields import Base64File
+
+
+class FilesForm(FormModel, register=False):
+    files: list[Base64File] = []
+
+
+def encode(content: bytes) -> str:
+    return base64.b64encode(content).decode()
+
+
+# decoding fails after the first block was written
+BROKEN = encode(b'x' * 100) + 'a'
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_rollback_keeps_overwritten_files(tmp_path, max_workers):
+    (tmp_path / 'a').write_bytes(b'old a')
+    form = FilesForm(files=[
+        Base64File(name='a', data=encode(b'new a'), path=str(tmp_path / 'a')),
+        Base64File(name='b', data=encode(b'new b')),
+        Base64File(name='c', data=BROKEN),
+    ])
+    with pytest.raises(Exception):
+        form.save_files(tmp_path, rollback=True, max_workers=max_workers)
+    assert (tmp_path / 'a').read_bytes() == b'old a'
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a']
+    assert [file.path for file in form.files] == [str(tmp_path / 'a'), None, None]
+
+
+def test_rollback_of_memory_storage():
+    storage = MemoryStorage()
+    storage.files['a'] = b'old a'
+    form = FilesForm(files=[Base64File(name='a', data=encode(b'new a')), Base64File(name='c', data=BROKEN)])
+    with pytest.raises(ValueError):
+        form.save_files(storage=storage, rollback=True)
+    assert storage.files == {'a': b'old a'}
+
+
+def test_failed_save_removes_partial_file(tmp_path):
+    with pytest.raises(ValueError):
+        FilesForm(files=[Base64File(name='c', data=BROKEN)]).save_files(tmp_path)
+    assert not list(tmp_path.iterdir())
+
+
+def test_sequential_delete_raises_original_error(tmp_path):
+    (tmp_path / 'a').write_bytes(b'a')
+    form = FilesForm(files=[Base64File(name='x', path=str(tmp_path / 'x')), Base64File(name='a', path=str(tmp_path / 'a'))])
+    with pytest.raises(FileNotFoundError):
+        form.delete_files()
+    assert (tmp_path / 'a').exists()
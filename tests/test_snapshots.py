@@ -0,0 +1,56 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FORMS = '''
+from enum import Enum
+from typing import Optional
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import FField
+
+
+class Country(Enum):
+    AT = 'Austria'
+    DE = 'Germany'
+
+
+class Address(FormModel):
+    country: Country = FField(indexed_choices=True)
+
+
+class Customer(FormModel):
+    name: str
+    address: Optional[Address] = None
+'''
+
+
+def run(directory: Path, script: str) -> str:
+    script = f'import sys\nsys.path[:0] = [{str(ROOT)!r}, {str(directory)!r}]\n' + textwrap.dedent(script)
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_restored_definitions_serve_choice_indexes(tmp_path):
+    (tmp_path / 'shop_forms.py').write_text(FORMS)
+    snapshot = tmp_path / 'forms.snapshot'
+    run(tmp_path, f'''
+        import shop_forms
+        from pydantic_form_model.snapshots import write_snapshot
+        write_snapshot({str(snapshot)!r}, [shop_forms.Address, shop_forms.Customer])
+    ''')
+    # a new worker that only loads the snapshot and never builds the fields
+    output = run(tmp_path, f'''
+        import shop_forms
+        from pydantic_form_model import get_choice_index
+        from pydantic_form_model.snapshots import load_snapshot
+        assert load_snapshot({str(snapshot)!r}, [shop_forms.Customer]).ok
+        assert shop_forms.Customer.get_form_definition().restored
+        index = get_choice_index('shop_forms.Country')
+        print(index.search('Ger').items)
+        assert shop_forms.Customer.get_form_definition().restored
+    ''')
+    assert output == "['Germany']"
@@ -0,0 +1,50 @@
+import gc
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import BinaryFile
+from pydantic_form_model.spooling import SpooledFile
+
+
+class UploadForm(FormModel, register=False):
+    document: BinaryFile
+
+
+def spooled_files(directory) -> list[str]:
+    return sorted(path.name for path in directory.iterdir() if path.name.startswith('spool-'))
+
+
+def test_dropped_form_removes_its_spooled_files(tmp_path):
+    form = UploadForm(document=BinaryFile(name='doc.pdf'))
+    form.ingest_files({'doc.pdf': b'x' * 100}, threshold=10, directory=tmp_path)
+    assert len(spooled_files(tmp_path)) == 1
+    del form
+    gc.collect()
+    assert spooled_files(tmp_path) == []
+
+
+def test_saved_spooled_file_is_moved(tmp_path):
+    spool_directory, storage_directory = tmp_path / 'spool', tmp_path / 'files'
+    spool_directory.mkdir()
+    storage_directory.mkdir()
+    form = UploadForm(document=BinaryFile(name='doc.pdf'))
+    form.ingest_files({'doc.pdf': b'x' * 100}, threshold=10, directory=spool_directory)
+    form.save_files(storage_directory)
+    gc.collect()
+    assert spooled_files(spool_directory) == []
+    assert (storage_directory / 'doc.pdf').read_bytes() == b'x' * 100
+
+
+def test_detached_file_is_kept(tmp_path):
+    spooled = SpooledFile('a', threshold=1, directory=tmp_path)
+    spooled.write(b'abc')
+    path = spooled.detach()
+    del spooled
+    gc.collect()
+    assert path.read_bytes() == b'abc'
+
+
+def test_discard_removes_the_file(tmp_path):
+    spooled = SpooledFile('a', threshold=1, directory=tmp_path)
+    spooled.write(b'abc')
+    spooled.discard()
+    assert spooled_files(tmp_path) == []
+    assert spooled.getvalue() == b''
@@ -0,0 +1,55 @@
+import pytest
+from pydantic_form_model import FormModel, UploadManager
+from pydantic_form_model.exceptions import FileTooLargeException, UploadException
+from pydantic_form_model.form_fields import BinaryFile, FField
+
+
+@pytest.mark.parametrize('upload_id', ['../victim', '/etc/passwd', 'A' * 32, '{' + 'a' * 32 + '}', 'a' * 31])
+def test_invalid_upload_ids_are_rejected(tmp_path, upload_id):
+    (tmp_path / 'victim.json').write_text('{}')
+    (tmp_path / 'victim.part').write_bytes(b'victim')
+    uploads = UploadManager(tmp_path / 'uploads')
+    for call in (uploads.status, uploads.path, uploads.finalize, uploads.release, uploads.abort):
+        with pytest.raises(UploadException):
+            call(upload_id)
+    with pytest.raises(UploadException):
+        uploads.write_chunk(upload_id, 0, b'x')
+    assert (tmp_path / 'victim.json').exists() and (tmp_path / 'victim.part').exists()
+
+
+class UploadForm(FormModel, register=False, max_form_size=100):
+    document: BinaryFile = FField(max_file_size=60)
+    attachments: list[BinaryFile] = []
+
+
+def finished_upload(uploads: UploadManager, name: str, size: int) -> str:
+    upload = uploads.open(name, size, chunk_size=size)
+    uploads.write_chunk(upload.upload_id, 0, b'x' * size)
+    uploads.finalize(upload.upload_id)
+    return upload.upload_id
+
+
+def upload_form(uploads: UploadManager, document_size: int, attachment_size: int = 0) -> UploadForm:
+    return UploadForm(
+        document=BinaryFile(name='document', upload_id=finished_upload(uploads, 'document', document_size)),
+        attachments=[BinaryFile(name='attachment', upload_id=finished_upload(uploads, 'attachment', attachment_size))] if attachment_size else [],
+    )
+
+
+@pytest.mark.parametrize('document_size, attachment_size', [(61, 0), (60, 41)])
+def test_uploads_beyond_the_limits_are_not_saved(tmp_path, document_size, attachment_size):
+    uploads = UploadManager(tmp_path / 'uploads')
+    (tmp_path / 'files').mkdir()
+    form = upload_form(uploads, document_size, attachment_size)
+    with pytest.raises(FileTooLargeException):
+        form.save_files(tmp_path / 'files', uploads=uploads)
+    assert list((tmp_path / 'files').iterdir()) == []
+    assert uploads.status(form.document.upload_id).finalized
+
+
+def test_uploads_within_the_limits_are_saved(tmp_path):
+    uploads = UploadManager(tmp_path / 'uploads')
+    (tmp_path / 'files').mkdir()
+    form = upload_form(uploads, 60, 40).save_files(tmp_path / 'files', uploads=uploads)
+    assert form.document.upload_id is None
+    assert (tmp_path / 'files' / 'document').stat().st_size == 60
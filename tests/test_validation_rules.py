@@ -0,0 +1,74 @@
+import logging
+from typing import Optional
+import pytest
+from pydantic import ValidationError
+from pydantic_form_model import FormModel
+from pydantic_form_model.form_fields import FField, RequiredIf, RequiredUnless, SameAs
+from pydantic_form_model.validation import error_texts
+
+
+class Address(FormModel, register=False):
+    country: Optional[str] = None
+    zip_code: Optional[str] = None
+
+
+class SignupForm(FormModel, register=False):
+    password: str
+    password_repeat: str = FField(validation_rules=[SameAs(other_field_name='password', error_text='Passwords differ')])
+    newsletter: bool = False
+    email: Optional[str] = FField(None, validation_rules=[RequiredIf(other_field_name='newsletter', error_text='Email is required')])
+    phone: Optional[str] = FField(None, validation_rules=[RequiredUnless(other_field_name='email', error_text='Phone or email is required')])
+    address: Address = Address()
+    state: Optional[str] = FField(None, validation_rules=[RequiredIf(other_field_name='address.country', error_text='State is required')])
+    zip_repeat: Optional[str] = FField(None, validation_rules=[SameAs(other_field_name='address.zipCode', error_text='Zip codes differ')])
+
+
+def validate(**data) -> dict[str, list[str]]:
+    data.setdefault('password', 'secret')
+    data.setdefault('passwordRepeat', data['password'])
+    data.setdefault('phone', '123')
+    try:
+        SignupForm.model_validate(data)
+    except ValidationError as e:
+        return error_texts(SignupForm, e)
+    return {}
+
+
+def test_valid_form():
+    assert validate() == {}
+
+
+def test_same_as():
+    assert validate(passwordRepeat='other') == {'password_repeat': ['Passwords differ']}
+
+
+def test_required_if_and_unless():
+    assert validate(newsletter=True) == {'email': ['Email is required']}
+    assert validate(newsletter=True, email='a@b.c') == {}
+    assert validate(phone=None) == {'phone': ['Phone or email is required']}
+    assert validate(phone=None, email='a@b.c') == {}
+
+
+def test_rules_on_nested_fields():
+    assert validate(address={'country': 'DE'}) == {'state': ['State is required']}
+    assert validate(address={'country': 'DE'}, state='BY') == {}
+    assert validate(address={'zipCode': '12345'}) == {'zip_repeat': ['Zip codes differ']}
+    assert validate(address={'zipCode': '12345'}, zipRepeat='12345') == {}
+
+
+def test_validate_field_with_nested_rule():
+    assert SignupForm.validate_field('state', None, {'address': {'country': 'DE'}}).errors == ['State is required']
+    assert SignupForm.validate_field('state', None, {'address': {}}).valid
+
+
+def test_unknown_field_is_reported_once(caplog):
+    class BrokenForm(FormModel, register=False):
+        name: Optional[str] = FField(None, validation_rules=[RequiredIf(other_field_name='missing.field', error_text='Name is required')])
+
+    with caplog.at_level(logging.WARNING, logger='pydantic_form_model.validation'):
+        assert BrokenForm(name=None).name is None
+        assert BrokenForm(name='x').name == 'x'
+    assert len(caplog.records) == 1
+    assert 'missing.field' in caplog.records[0].getMessage()
+    # the rule is still part of the form definition
+    assert BrokenForm.get_form_fields()[0].validation_rules[-1].other_field_name == 'missing.field'